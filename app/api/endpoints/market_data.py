@@ -1,79 +1,278 @@
-import httpx 
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import Literal, Optional
 from app.utils.responses import success_response, error_response
+from app.utils.encoding import dumps, encoded_response
+from app.utils.http_cache import bulk_signature, cache_control, etag_matches, make_etag, not_modified
+from app.utils.indicators import IndicatorSpec, parse_indicators
+from app.core.config import settings
+from app.services.market_data import normalize_window, count_statuses, fetch_market_data_service, fetch_multiple_market_data_service, fetch_customized_data_service, stream_multiple_market_data_service
+from app.services.volume_scanner import scan_unusual_volume_service
+from app.services.live_feed import Subscriber, live_feed_hub
 
-from app.services.market_data import fetch_market_data_service, fetch_multiple_market_data_service, fetch_customized_data_service
+# Las respuestas de error no se guardan en cachés intermedias
+NO_STORE = {"Cache-Control": "no-store"}
 
 router = APIRouter()
 
 @router.get("/market", summary="Obtiene una lista de símbolos")
 async def get_market_data(
+    request: Request,
     symbol: str = Query(..., description="Símbolo a buscar"),  # Hacemos 'symbol' obligatorio
     timeframe: Literal["1d", "1wk", "1mo"] = Query(..., description="Intervalo de tiempo para los datos"),
     period1: Optional[int] = Query(None, description="Inicio del periodo en timestamp UNIX (opcional)"),
     period2: Optional[int] = Query(None, description="Fin del periodo en timestamp UNIX (opcional)"),
+    format: Literal["rows", "columnar"] = Query("rows", description="Formato de 'bulk': lista de filas o listas paralelas"),
+    indicators: Optional[str] = Query(None, description="Indicadores técnicos separados por comas (ej. 'sma:20,ema:12,rsi:14,atr:14,vwap')"),
 ):
     """
     Endpoint para obtener datos de un símbolo específico.
+    Con 'indicators', agrega los valores de cada indicador alineados con 'bulk'.
+    Responde 304 si el ETag enviado en If-None-Match coincide con la última vela.
     """
+    indicator_specs = indicator_specs_or_422(indicators)
+
     # Llamar al servicio
-    response = await fetch_market_data_service(symbol=symbol, timeframe=timeframe, period1=period1, period2=period2)
-    data = response['data']
+    response = await fetch_market_data_service(symbol=symbol, timeframe=timeframe, period1=period1, period2=period2, columnar=format == "columnar", indicators=indicator_specs)
+    data = response.get('data')
     
     # Verificar si el servicio devolvió un error
-    if "error" in data:
-        return error_response(
+    if not data:
+        return encoded_response(request, error_response(
             f"Failed to fetch data for symbol {symbol} with timeframe {timeframe}",
-            errors=[data["error"]]
+            errors=[response.get("error")]
+        ), headers=NO_STORE)
+
+    # Velas vencidas de la caché (el proveedor falló): se entregan sin validación ni caché intermedia
+    if response.get("status") == "cached_stale":
+        return encoded_response(
+            request,
+            success_response(data, f"Stale data retrieved for symbol {symbol} with timeframe {timeframe}"),
+            headers=NO_STORE,
         )
 
+    # El ETag depende de la última vela, por lo que se compara antes de serializar
+    etag = make_etag(symbol, timeframe, format, data["dateStart"], data["dateEnd"], bulk_signature(data["bulk"]), *(spec.label for spec in indicator_specs))
+    cache_control_value = cache_control((timeframe,), normalize_window(0, period2)[1] if period2 else None)
+    if etag_matches(request, etag):
+        return not_modified(request, etag, cache_control_value)
+
     # Devolver respuesta de éxito
-    return success_response(data, f"Data retrieved for symbol {symbol} with timeframe {timeframe}")
+    return encoded_response(
+        request,
+        success_response(data, f"Data retrieved for symbol {symbol} with timeframe {timeframe}"),
+        headers={"ETag": etag, "Cache-Control": cache_control_value},
+    )
 
 @router.get("/market/bulk", summary="Obtiene datos de múltiples símbolos")
 async def get_multiple_market_data(
-    symbols: str = Query(..., description="Lista de símbolos separados por comas")
+    request: Request,
+    symbols: str = Query(..., description="Lista de símbolos separados por comas"),
+    format: Literal["rows", "columnar"] = Query("rows", description="Formato de cada temporalidad: lista de filas o listas paralelas"),
+    mode: Literal["upstream", "resample"] = Query("upstream", description="'resample' deriva las velas semanales y mensuales de una sola consulta diaria (si RESAMPLE_MODE_ENABLED está activo)"),
+    stream: bool = Query(False, description="Entrega un registro NDJSON por símbolo en cuanto termina, seguido de un resumen"),
+    indicators: Optional[str] = Query(None, description="Indicadores técnicos separados por comas, calculados en cada temporalidad (ej. 'sma:20,rsi:14')"),
+    deadline_ms: Optional[int] = Query(None, ge=1, description="Tiempo máximo de respuesta en milisegundos (también por encabezado X-Deadline-Ms)"),
 ):
     """
     Endpoint para obtener datos de mercado para múltiples símbolos.
+    Los símbolos se normalizan (mayúsculas, sin repetir) y cada uno indica su 'status'
+    (ok, timeout, upstream_error o cached_stale). Si se pide un plazo, se responde dentro de él.
+    Con 'indicators', cada símbolo incluye los valores por temporalidad alineados con sus velas.
+    Responde 304 si el ETag enviado en If-None-Match coincide con las últimas velas de todos los símbolos.
     """
+    indicator_specs = indicator_specs_or_422(indicators)
+    symbol_list = normalize_symbols_or_422(symbols)
+    budget = deadline_budget_or_422(request, deadline_ms)
+
+    if mode == "resample" and not settings.resample_mode_enabled:
+        raise HTTPException(status_code=422, detail="mode=resample is disabled on this deployment")
+
+    # Sin plazo se espera a todas las descargas; con plazo se reserva una parte para armar y serializar la respuesta
+    deadline = None
+    if budget is not None:
+        deadline = asyncio.get_running_loop().time() + max(0.0, budget - settings.bulk_deadline_reserve)
+
     try:
-        # Dividir los símbolos y llamar al servicio
-        symbol_list = symbols.split(",")
-        final_results = await fetch_multiple_market_data_service(symbol_list)
+        if stream:
+            records = stream_multiple_market_data_service(symbol_list, columnar=format == "columnar", mode=mode, indicators=indicator_specs, deadline=deadline)
+            return StreamingResponse(ndjson_lines(records), media_type="application/x-ndjson")
+
+        final_results = await fetch_multiple_market_data_service(symbol_list, columnar=format == "columnar", mode=mode, indicators=indicator_specs, deadline=deadline)
+        statuses = count_statuses(final_results)
+        deadline_ms = round(budget * 1000) if budget is not None else None
+        payload = {"results": final_results, "summary": {"requested": len(symbol_list), "deadlineMs": deadline_ms, "statuses": statuses}}
+
+        # Una respuesta parcial (algún símbolo o temporalidad con error o velas vencidas) no se valida
+        # ni se guarda en cachés intermedias, para que una falla temporal del proveedor no se sirva desde el edge
+        if statuses["ok"] < len(final_results) or any("errors" in result for result in final_results):
+            return encoded_response(request, success_response(
+                payload,
+                "Market data retrieved partially for multiple symbols"
+            ), headers=NO_STORE)
+
+        # El plazo forma parte del cuerpo ('deadlineMs') y puede llegar por encabezado
+        etag = make_etag(format, mode, deadline_ms, *(spec.label for spec in indicator_specs), *(
+            (result["symbol"], *(bulk_signature(bulk) for bulk in result["temporalities"].values()))
+            for result in final_results
+        ))
+        cache_control_value = cache_control(("1d", "1wk", "1mo"))
+        if etag_matches(request, etag):
+            return not_modified(request, etag, cache_control_value, vary=settings.bulk_deadline_header)
 
         # Devolver la respuesta final
-        return success_response(
-            {"results": final_results},
+        return encoded_response(request, success_response(
+            payload,
             "Market data retrieved for multiple symbols"
-        )
+        ), headers={"ETag": etag, "Cache-Control": cache_control_value, "Vary": settings.bulk_deadline_header})
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.get("/market/custom", summary="Obtiene datos personalizados para múltiples símbolos")
 async def get_data_customized(
-    symbols: str = Query(..., description="Lista de símbolos separados por comas")
+    request: Request,
+    symbols: str = Query(..., description="Lista de símbolos separados por comas"),
+    seasonality_detail: bool = Query(False, description="Agrega por mes calendario las muestras, retornos promedio y mediano y proporción al alza"),
 ):
     """
     Endpoint para obtener datos personalizados para múltiples símbolos.
+    La estacionalidad se calcula con la historia mensual de cada símbolo.
     """
-    try:
-        # Dividir los símbolos
-        symbol_list = symbols.split(",")
+    symbol_list = normalize_symbols_or_422(symbols)
 
+    try:
         # Llamar al servicio para procesar los datos personalizados
-        customized_results = await fetch_customized_data_service(symbol_list)
+        customized_results = await fetch_customized_data_service(symbol_list, seasonality_detail)
 
         # Devolver la respuesta final con éxito
-        return success_response(
+        return encoded_response(request, success_response(
             {"results": customized_results},
             "Customized market data retrieved successfully"
-        )
+        ))
     except Exception as e:
         # Devolver error en caso de falla
-        return error_response(
+        return encoded_response(request, error_response(
             "Failed to fetch customized market data",
             errors=[str(e)]
-        )
\ No newline at end of file
+        ))
+
+@router.get("/market/scan", summary="Escanea volumen inusual en múltiples símbolos")
+async def scan_market_volume(
+    request: Request,
+    symbols: str = Query(..., description="Lista de símbolos separados por comas"),
+    window: int = Query(None, ge=2, le=250, description="Días de referencia previos a cada día evaluado"),
+    lookback: int = Query(None, ge=1, le=20, description="Días más recientes a evaluar"),
+    min_zscore: Optional[float] = Query(None, description="|z-score| a partir del cual el volumen es inusual"),
+    min_relative_volume: Optional[float] = Query(None, description="Volumen relativo (volumen / media) a partir del cual es inusual"),
+    sort: Literal["score", "zscore", "relative_volume"] = Query("score", description="Criterio de orden descendente"),
+    only_unusual: bool = Query(False, description="Devuelve solo los símbolos con alguna señal inusual"),
+    limit: Optional[int] = Query(None, ge=1, description="Cantidad máxima de resultados"),
+):
+    """
+    Endpoint para escanear el volumen de un universo de símbolos y devolverlos ordenados.
+    """
+    symbol_list = normalize_symbols_or_422(symbols)
+
+    if len(symbol_list) > settings.scan_max_symbols:
+        return encoded_response(request, error_response(f"Too many symbols: the maximum is {settings.scan_max_symbols}"))
+
+    scan = await scan_unusual_volume_service(
+        symbol_list,
+        window=window,
+        lookback=lookback,
+        zscore_threshold=min_zscore,
+        relative_volume_threshold=min_relative_volume,
+        sort_by=sort,
+        only_unusual=only_unusual,
+        limit=limit,
+    )
+
+    return encoded_response(request, success_response(scan, f"Volume scan completed for {scan['scanned']} symbols"))
+
+@router.get("/market/live", summary="Suscripción en vivo a las velas de múltiples símbolos (SSE)")
+async def get_live_market_data(
+    symbols: str = Query(..., description="Lista de símbolos separados por comas"),
+    timeframes: str = Query("1d", description="Temporalidades separadas por comas ('1d', '1wk', '1mo')"),
+):
+    """
+    Endpoint de Server-Sent Events: envía un evento 'snapshot' por par (símbolo, temporalidad)
+    y luego eventos 'delta' solo con las velas que cambiaron. Todas las conexiones comparten
+    una sola consulta por par e intervalo.
+    """
+    timeframe_list = list(dict.fromkeys(timeframe.strip() for timeframe in timeframes.split(",") if timeframe.strip()))
+    keys = [(symbol, timeframe) for symbol in normalize_symbols_or_422(symbols) for timeframe in timeframe_list]
+
+    if any(timeframe not in ("1d", "1wk", "1mo") for timeframe in timeframe_list):
+        raise HTTPException(status_code=422, detail="timeframes must be '1d', '1wk' or '1mo'")
+    if not keys or len(keys) > settings.live_max_subscriptions:
+        raise HTTPException(status_code=422, detail=f"Between 1 and {settings.live_max_subscriptions} subscriptions are allowed")
+
+    return StreamingResponse(
+        sse_events(keys),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+async def sse_events(keys: list[tuple[str, str]]):
+    """
+    Serializa las actualizaciones del hub como eventos SSE; si no hay cambios envía un comentario de keepalive.
+    Al desconectarse el cliente se cancela la suscripción.
+    """
+    subscriber = Subscriber()
+    live_feed_hub.subscribe(subscriber, keys)
+
+    try:
+        while True:
+            updates = await subscriber.updates(settings.live_keepalive_interval)
+            if not updates:
+                yield b": keepalive\n\n"
+
+            for update in updates:
+                event = update.pop("event")
+                yield b"event: " + event.encode() + b"\ndata: " + dumps(update) + b"\n\n"
+    finally:
+        live_feed_hub.unsubscribe(subscriber)
+
+async def ndjson_lines(records):
+    """
+    Serializa cada registro como una línea JSON (NDJSON).
+    """
+    async for record in records:
+        yield dumps(record) + b"\n"
+
+def indicator_specs_or_422(indicators: Optional[str]) -> list[IndicatorSpec]:
+    """
+    Interpreta el parámetro 'indicators'; un indicador o periodo inválido responde 422.
+    """
+    try:
+        return parse_indicators(indicators)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+def normalize_symbols_or_422(symbols: str) -> list[str]:
+    """
+    Normaliza la lista de símbolos separada por comas: sin espacios, en mayúsculas y sin
+    repetir (se conserva el orden de la primera aparición). Una lista vacía responde 422.
+    """
+    symbol_list = list(dict.fromkeys(symbol.strip().upper() for symbol in symbols.split(",") if symbol.strip()))
+    if not symbol_list:
+        raise HTTPException(status_code=422, detail="At least one symbol is required")
+    return symbol_list
+
+def deadline_budget_or_422(request: Request, deadline_ms: Optional[int]) -> Optional[float]:
+    """
+    Obtiene el plazo de la solicitud en segundos: el parámetro 'deadline_ms', el encabezado
+    configurado o el valor por defecto, acotado al máximo. Un encabezado inválido responde 422.
+    :return: Plazo en segundos o None si no se pidió y no hay valor por defecto.
+    """
+    if deadline_ms is None:
+        header = request.headers.get(settings.bulk_deadline_header)
+        if header is not None:
+            if not header.strip().isdigit() or int(header) < 1:
+                raise HTTPException(status_code=422, detail=f"{settings.bulk_deadline_header} must be a positive integer of milliseconds")
+            deadline_ms = int(header)
+
+    budget = deadline_ms / 1000 if deadline_ms is not None else settings.bulk_deadline
+    return min(budget, settings.bulk_max_deadline) if budget is not None else None
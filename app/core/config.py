@@ -1,11 +1,129 @@
+from functools import lru_cache
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
-    database_url: str
-    secret_key: str
+    # No los usa el código de mercado; opcionales para no exigirlos en cada despliegue
+    database_url: Optional[str] = None
+    secret_key: Optional[str] = None
     market_data_api_url: str
 
+    # Solicitudes duplicadas (hedging) cuando una descarga supera el percentil de latencia reciente
+    hedge_enabled: bool = True
+    hedge_percentile: float = 95.0
+    hedge_min_delay: float = 0.05  # Segundos mínimos de espera antes de duplicar
+    hedge_min_samples: int = 20  # Latencias observadas antes de empezar a duplicar
+    hedge_window: int = 500  # Latencias recientes consideradas
+    hedge_max_ratio: float = 0.1  # Máximo de duplicados respecto del total de descargas
+
+    # Presupuesto de tiempo de /api/market/bulk (parámetro 'deadline_ms' o encabezado)
+    bulk_deadline: Optional[float] = None  # Segundos por defecto; sin valor solo aplica si el cliente lo pide
+    bulk_max_deadline: float = 30.0
+    bulk_deadline_header: str = "X-Deadline-Ms"
+    bulk_deadline_reserve: float = 0.05  # Segundos reservados para armar y serializar la respuesta
+
+    # Pool de conexiones HTTP hacia los proveedores externos
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http2_enabled: bool = False
+    http_timeout: float = 10.0
+    http_host_timeouts: dict[str, float] = {}  # Timeout específico por host, ej. {"query1.finance.yahoo.com": 5}
+
+    # Caché en memoria de respuestas OHLCV
+    cache_max_entries: int = 2048
+    cache_max_bytes: int = 64 * 1024 * 1024
+    cache_ttl_market_open: float = 60.0  # '1d' durante el horario de mercado
+    cache_ttl_market_closed: float = 900.0  # '1d' con el mercado cerrado
+    cache_ttl_1wk: float = 3600.0
+    cache_ttl_1mo: float = 6 * 3600.0
+
+    # Limitador adaptativo por host (token bucket + concurrencia AIMD) y reintentos
+    rate_limit_initial_concurrency: int = 10
+    rate_limit_min_concurrency: int = 1
+    rate_limit_max_concurrency: int = 50
+    rate_limit_requests_per_second: Optional[float] = None  # Sin valor no se limita la tasa (solo la concurrencia AIMD)
+    rate_limit_burst: int = 20
+    rate_limit_decrease_factor: float = 0.5
+    rate_limit_decrease_interval: float = 1.0
+    rate_limit_max_retries: int = 3
+    rate_limit_backoff_base: float = 0.25
+    rate_limit_backoff_max: float = 10.0
+
+    # Modo 'resample' de /api/market/bulk (semanas y meses derivados de velas diarias). Desactivado
+    # hasta validar la paridad con respuestas reales grabadas de Yahoo (tests/test_resampler.py)
+    resample_mode_enabled: bool = False
+
+    # Almacén persistente de velas históricas
+    bar_store_enabled: bool = True
+    bar_store_dir: str = ".data/bars"
+
+    # Escáner de volumen inusual
+    scan_window: int = 10  # Días de referencia previos a cada día evaluado
+    scan_lookback: int = 2  # Días más recientes evaluados (hoy y el día anterior)
+    scan_zscore_threshold: float = 2.0
+    scan_relative_volume_threshold: float = 2.0
+    scan_max_symbols: int = 1000
+
+    # Estacionalidad calculada con velas mensuales propias
+    seasonality_years: int = 15  # Años de historia mensual considerados
+    seasonality_min_samples: int = 3  # Años mínimos de un mes para dar una tendencia
+
+    # Motor de indicadores técnicos (estado incremental por símbolo, granularidad e indicador)
+    indicator_max_states: int = 4096
+
+    # Compresión de respuestas (brotli solo si el paquete está instalado)
+    compression_min_size: int = 1024  # Bytes; los cuerpos más pequeños se envían sin comprimir
+    gzip_level: int = 5
+    brotli_quality: int = 4
+
+    # Caché HTTP (navegadores y edge de Vercel) de los endpoints de mercado
+    http_cache_closed_max_age: int = 86400  # Tope de s-maxage con el mercado cerrado
+    http_cache_immutable_max_age: int = 604800  # Rangos que terminan antes del periodo en curso
+
+    # Precarga en segundo plano de una lista de símbolos (desactivada si la lista está vacía)
+    prefetch_watchlist: list[str] = []  # ej. PREFETCH_WATCHLIST='["AAPL", "MSFT"]'
+    prefetch_timeframes: list[str] = ["1d", "1wk", "1mo"]
+    prefetch_interval: float = 60.0  # Segundos entre actualizaciones con el mercado abierto
+    prefetch_preopen_lead: float = 300.0  # Segundos antes de la apertura
+    prefetch_after_close_delay: float = 300.0  # Segundos después del cierre, para capturar las velas finales
+    prefetch_grace: float = 120.0  # Margen de TTL sobre la siguiente actualización
+    prefetch_concurrency: int = 5
+
+    # Feed en vivo (SSE)
+    live_poll_interval: float = 15.0  # Segundos entre consultas de cada par con el mercado abierto
+    live_poll_interval_closed: float = 300.0
+    live_keepalive_interval: float = 15.0
+    live_max_subscriptions: int = 50  # Pares (símbolo, temporalidad) por conexión
+
+    # Arranque en frío: registrar los routers (e importar los servicios) en la primera solicitud
+    lazy_routers: bool = True
+
+    # Instrumentación: las solicitudes con este encabezado reciben el desglose por etapa en Server-Timing
+    profiling_header: str = "X-Profile"
+
     class Config:
         env_file = ".env"
+        # Variables que ya no se usan (ej. SEASONALITY_API_URL) no impiden el arranque
+        extra = "ignore"
+
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Construye la configuración (variables de entorno y .env) la primera vez que se necesita.
+    """
+    return Settings()
+
+class LazySettings:
+    """
+    Acceso diferido a la configuración: importar 'settings' no lee el entorno ni el
+    archivo .env; eso ocurre al leer el primer valor y el resultado queda en caché.
+    """
+
+    def __getattr__(self, name: str):
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(get_settings(), name, value)
 
-settings = Settings()
+settings: Settings = LazySettings()
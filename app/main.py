@@ -1,7 +1,95 @@
-from fastapi import FastAPI
-from app.api.endpoints import market_data
+import sys
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.utils.metrics import HTTP_REQUEST_DURATION, current_profile, gauge_lines, render_metrics, server_timing
 
-app = FastAPI()
+# Los servicios (httpx, cachés, calendario) se importan al usarse por primera vez para
+# que importar la aplicación sea rápido en un arranque en frío; la configuración
+# tampoco se lee hasta la primera solicitud.
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if not settings.lazy_routers:
+        include_routers()
+
+    # La precarga solo se importa si hay una lista de símbolos configurada
+    if settings.prefetch_watchlist:
+        from app.services.prefetch import prefetch_scheduler
+        prefetch_scheduler.start()
+
+    yield
+
+    if "app.services.prefetch" in sys.modules:
+        await sys.modules["app.services.prefetch"].prefetch_scheduler.stop()
+
+    # Los clientes HTTP se crean al primer uso; cerrarlos solo si llegaron a crearse
+    if "app.services.http_clients" in sys.modules:
+        await sys.modules["app.services.http_clients"].close_clients()
+
+app = FastAPI(lifespan=lifespan)
+
+_routers_included = False
+
+def include_routers() -> None:
+    """
+    Registra los routers de la API (y con ello importa los servicios) una sola vez.
+    """
+    global _routers_included
+    if _routers_included:
+        return
+
+    from app.api.endpoints import market_data
+
+    # Rutas para Market Data
+    app.include_router(market_data.router, prefix="/api", tags=["Market Data"])
+    _routers_included = True
+
+# Rutas que requieren los routers registrados; /health y /metrics no los necesitan
+ROUTER_PATH_PREFIXES = ("/api", "/docs", "/redoc", "/openapi.json")
+
+class LazyRoutersMiddleware:
+    """
+    Middleware ASGI que registra los routers al llegar la primera solicitud HTTP que
+    los necesita, antes de que se resuelva la ruta (incluida la generación de /openapi.json).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not _routers_included and scope["path"].startswith(ROUTER_PATH_PREFIXES):
+            include_routers()
+        await self.app(scope, receive, send)
+
+app.add_middleware(LazyRoutersMiddleware)
+
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    """
+    Mide la duración de cada solicitud y, si se pidió perfilado, agrega el desglose por etapa.
+    """
+    profile = {} if request.headers.get(settings.profiling_header) else None
+    token = current_profile.set(profile)
+    started = time.perf_counter()
+
+    try:
+        response = await call_next(request)
+    finally:
+        current_profile.reset(token)
+
+    duration = time.perf_counter() - started
+    # Se usa la plantilla de la ruta (ej. /api/market) para no crear una serie por URL
+    route = request.scope.get("route")
+    HTTP_REQUEST_DURATION.observe(duration, getattr(route, "path", "unmatched"), response.status_code)
+
+    if profile is not None:
+        profile["total"] = (duration, 1)
+        response.headers["Server-Timing"] = server_timing(profile)
+
+    return response
 
 @app.get("/")
 async def read_root():
@@ -11,5 +99,60 @@ async def read_root():
 def health_check():
     return {"status": "ok"}
 
-# Rutas para Market Data
-app.include_router(market_data.router, prefix="/api", tags=["Market Data"])
\ No newline at end of file
+@app.get("/health/http-pools")
+def http_pools():
+    """Estadísticas de los pools de conexiones hacia los proveedores."""
+    from app.services.http_clients import get_pool_stats
+    return {"pools": get_pool_stats()}
+
+@app.get("/health/rate-limits")
+def rate_limits():
+    """Límites actuales y tiempos de espera de los limitadores por host."""
+    from app.services.rate_limiter import get_limiter_stats
+    return {"limiters": get_limiter_stats()}
+
+@app.get("/health/hedging")
+def hedging_stats():
+    """Descargas duplicadas por superar el percentil de latencia y cuántas respondieron primero."""
+    from app.services.market_data import chart_hedger
+    return chart_hedger.stats()
+
+@app.get("/health/cache")
+def cache_stats():
+    """Contadores de la caché de datos de mercado."""
+    from app.services.market_data import market_data_cache, seasonality_cache
+    return {"market_data": market_data_cache.stats(), "seasonality": seasonality_cache.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Métricas en formato de texto de Prometheus."""
+    from app.services.market_data import market_data_cache, seasonality_cache
+    from app.services.prefetch import prefetch_scheduler
+    from app.services.rate_limiter import get_limiter_stats
+
+    cache_gauges = {name: cache.stats() for name, cache in (("market_data", market_data_cache), ("seasonality", seasonality_cache))}
+    limiter_gauges = get_limiter_stats()
+
+    gauges = [
+        gauge_lines("quantamu_cache_entries", "Entradas almacenadas en la caché.", "cache", {name: stats["entries"] for name, stats in cache_gauges.items()}),
+        gauge_lines("quantamu_cache_hit_ratio", "Proporción de aciertos de la caché.", "cache", {name: stats["hit_ratio"] for name, stats in cache_gauges.items()}),
+        gauge_lines("quantamu_limiter_concurrency_limit", "Concurrencia permitida por el limitador.", "host", {host: stats["concurrency_limit_exact"] for host, stats in limiter_gauges.items()}),
+        gauge_lines("quantamu_limiter_queued", "Solicitudes esperando en el limitador.", "host", {host: stats["queued"] for host, stats in limiter_gauges.items()}),
+    ]
+
+    lag = prefetch_scheduler.max_lag()
+    if lag is not None:
+        gauges.append(gauge_lines("quantamu_prefetch_max_lag_seconds", "Segundos desde la actualización más antigua de la precarga.", "watchlist", {"default": round(lag, 3)}))
+    return PlainTextResponse(render_metrics(gauges), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/prefetch")
+def prefetch_stats():
+    """Estado de la precarga de la lista de símbolos: próxima ejecución, retraso y errores."""
+    from app.services.prefetch import prefetch_scheduler
+    return prefetch_scheduler.stats()
+
+@app.get("/health/live")
+def live_feed_stats():
+    """Pares consultados por el feed en vivo y sus suscriptores."""
+    from app.services.live_feed import live_feed_hub
+    return live_feed_hub.stats()
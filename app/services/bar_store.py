@@ -0,0 +1,256 @@
+import math
+import mmap
+import os
+import re
+import struct
+from datetime import date, datetime, time, timezone
+from typing import NamedTuple, Optional
+from app.core.config import settings
+from app.services.holiday_checker import period_start
+
+# Registro de ancho fijo: timestamp, open, high, low, close, volume (48 bytes)
+RECORD = struct.Struct("<q4dq")
+
+# Encabezado del archivo (mismo ancho que un registro): firma, inicio y fin de la cobertura, símbolo
+HEADER = struct.Struct("<8sqq24s")
+MAGIC = b"QBARS001"
+
+# Marcador de volumen nulo (los precios nulos se guardan como NaN)
+NULL_VOLUME = -1
+
+# Diferencia relativa a partir de la cual un precio descargado no coincide con el guardado
+PRICE_TOLERANCE = 1e-6
+
+# Símbolos y granularidades que pueden convertirse en rutas del almacén
+SYMBOL_PATTERN = re.compile(r"^[A-Z0-9.^=-]{1,15}$")
+TIMEFRAMES = ("1d", "1wk", "1mo")
+
+class Coverage(NamedTuple):
+    """Rango [covered_from, covered_to) cuyas velas completas están guardadas."""
+    covered_from: int
+    covered_to: int
+    symbol: str
+
+def completed_boundary(timeframe: str, now: datetime = None) -> int:
+    """
+    Timestamp a partir del cual las velas aún pueden cambiar (inicio del periodo en curso, UTC).
+    :param timeframe: '1d', '1wk', '1mo'
+    """
+    today = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).date()
+    return _timestamp(period_start(today, timeframe))
+
+def _timestamp(day: date) -> int:
+    return int(datetime.combine(day, time(), timezone.utc).timestamp())
+
+def bars_from_chart(raw_data: dict) -> tuple[str, list[tuple]]:
+    """
+    Extrae las velas de una respuesta cruda de Yahoo Finance.
+    :param raw_data: Diccionario crudo recibido de Yahoo Finance.
+    :return: Tuple con el símbolo y la lista de velas (timestamp, open, high, low, close, volume).
+    """
+    result = raw_data.get("chart", {}).get("result", [])[0]
+    timestamps = result.get("timestamp") or []
+    quote = result["indicators"]["quote"][0] if timestamps else {}
+
+    bars = list(zip(
+        timestamps,
+        quote.get("open", []),
+        quote.get("high", []),
+        quote.get("low", []),
+        quote.get("close", []),
+        quote.get("volume", []),
+    ))
+    return result["meta"]["symbol"], bars
+
+def has_splits(raw_data: dict) -> bool:
+    """
+    Indica si una respuesta cruda de Yahoo Finance incluye splits ('events.splits').
+    Yahoo ajusta retroactivamente los precios de 'chart' por splits, por lo que las
+    velas guardadas antes del split ya no coinciden con las nuevas.
+    """
+    result = raw_data.get("chart", {}).get("result", [])[0]
+    return bool((result.get("events") or {}).get("splits"))
+
+def same_prices(bar: tuple, other: tuple) -> bool:
+    """
+    Compara los precios (open, high, low, close) de dos velas con tolerancia relativa.
+    """
+    for price, other_price in zip(bar[1:5], other[1:5]):
+        if price is None or other_price is None:
+            if price is not other_price:
+                return False
+        elif abs(price - other_price) > PRICE_TOLERANCE * max(abs(other_price), 1.0):
+            return False
+    return True
+
+def chart_payload(symbol: str, bars: list[tuple]) -> dict:
+    """
+    Construye una respuesta con la forma de Yahoo Finance a partir de velas.
+    :param symbol: Símbolo de las velas.
+    :param bars: Lista de velas ordenadas por timestamp.
+    :return: Diccionario compatible con transform_yahoo_data.
+    """
+    timestamps, opens, highs, lows, closes, volumes = (list(column) for column in zip(*bars)) if bars else ([],) * 6
+    return {
+        "chart": {
+            "result": [{
+                "meta": {"symbol": symbol},
+                "timestamp": timestamps,
+                "indicators": {"quote": [{
+                    "open": opens,
+                    "high": highs,
+                    "low": lows,
+                    "close": closes,
+                    "volume": volumes,
+                }]},
+            }]
+        }
+    }
+
+def _pack(bar: tuple) -> bytes:
+    timestamp, *prices, volume = bar
+    prices = [math.nan if price is None else price for price in prices]
+    return RECORD.pack(timestamp, *prices, NULL_VOLUME if volume is None else volume)
+
+def _unpack(record: tuple) -> tuple:
+    timestamp, *prices, volume = record
+    prices = [None if math.isnan(price) else price for price in prices]
+    return (timestamp, *prices, None if volume == NULL_VOLUME else volume)
+
+class BarStore:
+    """
+    Almacén en disco de velas históricas por (símbolo, granularidad).
+    Cada serie es un archivo de registros de ancho fijo ordenados por timestamp
+    que se lee mediante memory-mapping, sin copiar el archivo completo.
+    Solo se guardan velas completas, por lo que al proveedor solo se le pide
+    el tramo posterior a la cobertura guardada. Sin directorio explícito se usa
+    settings.bar_store_dir, leído al primer uso.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self._directory = directory
+
+    @property
+    def directory(self) -> str:
+        return settings.bar_store_dir if self._directory is None else self._directory
+
+    @staticmethod
+    def accepts(symbol: str, timeframe: str) -> bool:
+        """
+        Indica si la serie puede guardarse: el símbolo (en mayúsculas) y la granularidad
+        deben estar en la lista permitida, para que no formen rutas fuera del directorio.
+        """
+        return timeframe in TIMEFRAMES and SYMBOL_PATTERN.match(symbol.upper()) is not None
+
+    def _path(self, symbol: str, timeframe: str) -> str:
+        """
+        :raises ValueError: Si el símbolo o la granularidad no son válidos (ver accepts).
+        """
+        if not self.accepts(symbol, timeframe):
+            raise ValueError(f"Invalid series for the bar store: {symbol!r} ({timeframe!r})")
+        return os.path.join(self.directory, timeframe, f"{symbol.upper()}.bars")
+
+    def coverage(self, symbol: str, timeframe: str) -> Optional[Coverage]:
+        """
+        Obtiene el rango guardado de una serie.
+        :return: Cobertura de la serie o None si no existe.
+        """
+        try:
+            with open(self._path(symbol, timeframe), "rb") as file:
+                header = file.read(HEADER.size)
+        except FileNotFoundError:
+            return None
+
+        if len(header) < HEADER.size:
+            return None
+
+        magic, covered_from, covered_to, stored_symbol = HEADER.unpack(header)
+        if magic != MAGIC:
+            return None
+
+        return Coverage(covered_from, covered_to, stored_symbol.rstrip(b"\0").decode())
+
+    def read(self, symbol: str, timeframe: str, period1: int, period2: int) -> list[tuple]:
+        """
+        Lee las velas guardadas con timestamp en [period1, period2).
+        :return: Lista de velas (timestamp, open, high, low, close, volume) ordenadas.
+        """
+        try:
+            file = open(self._path(symbol, timeframe), "rb")
+        except FileNotFoundError:
+            return []
+
+        with file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            count = (len(mapped) - HEADER.size) // RECORD.size
+            start = self._bisect(mapped, count, period1)
+            end = self._bisect(mapped, count, period2)
+
+            with memoryview(mapped) as view:
+                records = view[HEADER.size + start * RECORD.size:HEADER.size + end * RECORD.size]
+                bars = [_unpack(record) for record in RECORD.iter_unpack(records)]
+                records.release()
+
+        return bars
+
+    def last(self, symbol: str, timeframe: str) -> Optional[tuple]:
+        """
+        Lee la vela guardada más reciente de una serie.
+        :return: Vela (timestamp, open, high, low, close, volume) o None si la serie no tiene velas.
+        """
+        try:
+            with open(self._path(symbol, timeframe), "rb") as file:
+                file.seek(0, os.SEEK_END)
+                if file.tell() < HEADER.size + RECORD.size:
+                    return None
+                file.seek(-RECORD.size, os.SEEK_END)
+                return _unpack(RECORD.unpack(file.read(RECORD.size)))
+        except FileNotFoundError:
+            return None
+
+    def write(self, symbol: str, timeframe: str, stored_symbol: str, covered_from: int, covered_to: int, bars: list[tuple]) -> None:
+        """
+        Reescribe por completo una serie de forma atómica.
+        :param bars: Velas completas ordenadas por timestamp.
+        """
+        path = self._path(symbol, timeframe)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(self._header(stored_symbol, covered_from, covered_to))
+            file.write(b"".join(_pack(bar) for bar in bars))
+        os.replace(temp_path, path)
+
+    def append(self, symbol: str, timeframe: str, covered_to: int, bars: list[tuple]) -> None:
+        """
+        Agrega velas posteriores a la cobertura actual y extiende su fin.
+        Las velas anteriores al fin de la cobertura ya están guardadas y se descartan.
+        :param bars: Velas completas ordenadas por timestamp.
+        """
+        coverage = self.coverage(symbol, timeframe)
+        if coverage is None or covered_to <= coverage.covered_to:
+            return
+
+        bars = [bar for bar in bars if bar[0] >= coverage.covered_to]
+
+        with open(self._path(symbol, timeframe), "r+b") as file:
+            file.seek(0, os.SEEK_END)
+            file.write(b"".join(_pack(bar) for bar in bars))
+            file.seek(0)
+            file.write(self._header(coverage.symbol, coverage.covered_from, covered_to))
+
+    @staticmethod
+    def _header(symbol: str, covered_from: int, covered_to: int) -> bytes:
+        return HEADER.pack(MAGIC, covered_from, covered_to, symbol.encode()[:24])
+
+    @staticmethod
+    def _bisect(mapped: mmap.mmap, count: int, timestamp: int) -> int:
+        """Busca el primer registro con timestamp >= al indicado."""
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            if struct.unpack_from("<q", mapped, HEADER.size + middle * RECORD.size)[0] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
@@ -0,0 +1,193 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+from app.core.config import settings
+
+class TTLCache:
+    """
+    Caché en memoria con expiración por entrada (TTL), desalojo LRU acotado por
+    número de entradas y tamaño estimado, y coalescencia de solicitudes
+    (single-flight): los fallos concurrentes de una misma llave comparten una
+    sola llamada al proveedor. Sin límites explícitos se usan los de la
+    configuración, leídos al primer uso. Las entradas vencidas se conservan
+    hasta ser reemplazadas o desalojadas, para servirlas como respaldo
+    (get_stale) cuando el proveedor falla o no responde a tiempo.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, tuple[float, int, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._bytes = 0
+
+        # Contadores
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+    @property
+    def max_entries(self) -> int:
+        return settings.cache_max_entries if self._max_entries is None else self._max_entries
+
+    @property
+    def max_bytes(self) -> int:
+        return settings.cache_max_bytes if self._max_bytes is None else self._max_bytes
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Obtiene un valor vigente de la caché y lo marca como usado recientemente.
+        :param key: Llave de la entrada.
+        :return: Valor almacenado o None si no existe o expiró.
+        """
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self.expirations += 1
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def get_stale(self, key: Hashable) -> Optional[Any]:
+        """
+        Obtiene el último valor guardado para la llave aunque haya expirado.
+        :param key: Llave de la entrada.
+        :return: Valor almacenado o None si nunca se guardó o ya fue desalojado.
+        """
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        self.stale_hits += 1
+        return entry[2]
+
+    def set(self, key: Hashable, value: Any, ttl: float, size: int = 1) -> None:
+        """
+        Guarda un valor con su TTL y desaloja las entradas menos usadas si se excede el límite.
+        :param key: Llave de la entrada.
+        :param value: Valor a guardar.
+        :param ttl: Tiempo de vida en segundos.
+        :param size: Tamaño estimado del valor en bytes.
+        """
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    async def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: float,
+        size_of: Callable[[Any], int] = lambda value: 1,
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """
+        Devuelve el valor en caché o lo obtiene una sola vez aunque haya solicitudes concurrentes.
+        :param key: Llave de la entrada.
+        :param fetch: Función asíncrona que obtiene el valor del proveedor.
+        :param ttl: Tiempo de vida en segundos del valor obtenido.
+        :param size_of: Función que estima el tamaño en bytes del valor.
+        :param cacheable: Función que indica si el valor obtenido debe guardarse (ej. no guardar errores).
+        :return: Valor de la caché o del proveedor.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        # Si ya hay una solicitud en curso para la misma llave, esperar su resultado
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+
+        self.misses += 1
+        return await asyncio.shield(self._start_fetch(key, fetch, ttl, size_of, cacheable))
+
+    async def refresh(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: float,
+        size_of: Callable[[Any], int] = lambda value: 1,
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """
+        Obtiene el valor del proveedor aunque haya una entrada vigente y la reemplaza (precarga).
+        Mientras tanto la entrada anterior sigue sirviendo a las solicitudes.
+        :param ttl: Tiempo de vida en segundos del valor obtenido.
+        :return: Valor obtenido del proveedor.
+        """
+        task = self._inflight.get(key) or self._start_fetch(key, fetch, ttl, size_of, cacheable)
+        value = await asyncio.shield(task)
+
+        # Si se reutilizó una consulta en curso, guardar con el TTL de la precarga
+        if cacheable(value):
+            self.set(key, value, ttl, size_of(value))
+        return value
+
+    def _start_fetch(self, key: Hashable, fetch, ttl: float, size_of, cacheable) -> asyncio.Task:
+        # La consulta corre en su propia tarea para que cancelar a un solicitante no afecte a los demás
+        task = asyncio.ensure_future(fetch())
+        self._inflight[key] = task
+
+        def store(done: asyncio.Task):
+            self._inflight.pop(key, None)
+            if done.cancelled() or done.exception() is not None:
+                return
+            value = done.result()
+            if cacheable(value):
+                self.set(key, value, ttl, size_of(value))
+
+        task.add_done_callback(store)
+        return task
+
+    def clear(self) -> None:
+        """Elimina todas las entradas."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Obtiene los contadores de la caché.
+        :return: Diccionario con aciertos, fallos, desalojos y ocupación.
+        """
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "stale_hits": self.stale_hits,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
@@ -0,0 +1,98 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+from app.core.config import settings
+
+T = TypeVar("T")
+
+class HedgedRequests:
+    """
+    Envía una copia de una descarga cuando la original supera el percentil
+    configurado de las latencias recientes (hedging), y se queda con la primera
+    que responda bien; la otra se cancela. Los duplicados se limitan a una
+    fracción del total de descargas para no saturar al proveedor. No se duplica
+    hasta reunir suficientes latencias para estimar el percentil.
+    """
+
+    def __init__(self):
+        self._latencies: Optional[deque] = None
+
+        # Contadores
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @property
+    def latencies(self) -> deque:
+        if self._latencies is None:
+            self._latencies = deque(maxlen=settings.hedge_window)
+        return self._latencies
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Calcula la espera antes de enviar la copia.
+        :return: Segundos de espera o None si no corresponde duplicar.
+        """
+        if not settings.hedge_enabled or len(self.latencies) < settings.hedge_min_samples:
+            return None
+        if self.hedges >= settings.hedge_max_ratio * self.requests:
+            return None
+
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * settings.hedge_percentile / 100))
+        return max(settings.hedge_min_delay, ordered[index])
+
+    async def run(self, fetch: Callable[[], Awaitable[T]]) -> T:
+        """
+        Ejecuta la descarga y, si tarda más que el percentil, una copia en paralelo.
+        :param fetch: Función asíncrona que realiza la descarga; se llama una o dos veces.
+        :return: Resultado de la primera descarga exitosa.
+        :raises Exception: El error de la última descarga si ninguna tuvo éxito.
+        """
+        self.requests += 1
+        delay = self.hedge_delay()
+        primary = asyncio.ensure_future(fetch())
+        pending = {primary}
+
+        # Se registra la latencia de la descarga que respondió, desde su propio inicio
+        started = {primary: time.monotonic()}
+
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done and self.hedge_delay() is not None:
+                    self.hedges += 1
+                    hedge = asyncio.ensure_future(fetch())
+                    started[hedge] = time.monotonic()
+                    pending.add(hedge)
+
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.latencies.append(time.monotonic() - started[task])
+                        self.hedge_wins += task is not primary
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # La descarga que no ganó (o ambas, si se cancela la espera) no sigue ocupando al proveedor
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        """
+        Obtiene los contadores de duplicados.
+        :return: Diccionario con descargas, duplicados enviados, duplicados que respondieron primero y la espera actual.
+        """
+        delay = self.hedge_delay()
+        return {
+            "enabled": settings.hedge_enabled,
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "samples": len(self.latencies),
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+        }
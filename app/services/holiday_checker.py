@@ -1,50 +1,68 @@
-from datetime import datetime, timedelta
-
-# Lista de días festivos en EE.UU.
-US_HOLIDAYS = [
-    "2024-01-01", "2024-01-15", "2024-02-19", "2024-03-29", "2024-05-27",
-    "2024-06-19", "2024-07-04", "2024-09-02", "2024-11-28", "2024-12-25",
-    "2025-01-01", "2025-01-20", "2025-02-17", "2025-04-18", "2025-05-26",
-    "2025-06-19", "2025-07-04", "2025-09-01", "2025-11-27", "2025-12-25",
-    "2026-01-01", "2026-01-19", "2026-02-16", "2026-04-03", "2026-05-25",
-    "2026-06-19", "2026-07-03", "2026-09-07", "2026-11-26", "2026-12-25"
-]
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+from app.services.trading_calendar import EARLY_CLOSE, trading_calendar
+
+# Zona horaria y horario regular de la bolsa (NYSE)
+MARKET_TIMEZONE = ZoneInfo("America/New_York")
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
 
 def is_weekend(date: datetime) -> bool:
     """Verifica si la fecha es un fin de semana."""
     return date.weekday() >= 5  # Sábado (5) o domingo (6)
 
 def is_holiday(date: datetime) -> bool:
-    """Verifica si la fecha es un día festivo en EE.UU."""
-    return date.strftime("%Y-%m-%d") in US_HOLIDAYS
+    """Verifica si la fecha es un día festivo de la bolsa en EE.UU."""
+    if isinstance(date, datetime):
+        date = date.date()
+    return trading_calendar.is_holiday(date)
+
+def period_start(day: date, timeframe: str) -> date:
+    """
+    Obtiene el día de inicio del periodo (día, semana o mes) que contiene la fecha.
+    :param day: Fecha a evaluar.
+    :param timeframe: '1d', '1wk', '1mo'
+    """
+    if timeframe == "1wk":
+        return day - timedelta(days=day.weekday())
+    if timeframe == "1mo":
+        return day.replace(day=1)
+    return day
 
 def is_first_business_day_of_week() -> bool:
     """Verifica si hoy es el primer día laboral de la semana."""
     today = datetime.now().date()
-    yesterday = today - timedelta(days=1)
-
-    # Hoy no debe ser fin de semana ni feriado
-    if is_holiday(today) or is_weekend(today):
-        return False
-
-    # Ayer debe haber sido un feriado o fin de semana
-    if is_holiday(yesterday) or is_weekend(yesterday):
-        return True
-
-    return False
+    return trading_calendar.first_business_day_of_week(today) == today
 
 def is_first_business_day_of_month() -> bool:
     """Verifica si hoy es el primer día laboral del mes."""
     today = datetime.now().date()
+    return trading_calendar.first_business_day_of_month(today) == today
+
+def is_market_open(now: datetime = None) -> bool:
+    """Verifica si la bolsa está en horario regular de operación."""
+    now = (now or datetime.now(MARKET_TIMEZONE)).astimezone(MARKET_TIMEZONE)
 
-    # Hoy no debe ser fin de semana ni feriado
-    if is_holiday(today) or is_weekend(today):
+    if not trading_calendar.is_business_day(now.date()):
         return False
 
-    # Busca el primer día laboral del mes
-    first_day = today.replace(day=1)
-    while is_holiday(first_day) or is_weekend(first_day):
-        first_day += timedelta(days=1)
+    close = EARLY_CLOSE if trading_calendar.is_early_close(now.date()) else MARKET_CLOSE
+    return MARKET_OPEN <= now.time() < close
+
+def seconds_until_market_open(now: datetime = None) -> float:
+    """
+    Calcula los segundos que faltan para la próxima apertura regular (0 si la bolsa está abierta).
+    """
+    now = (now or datetime.now(MARKET_TIMEZONE)).astimezone(MARKET_TIMEZONE)
+
+    if is_market_open(now):
+        return 0.0
+
+    day = now.date()
+    if trading_calendar.is_business_day(day) and now.time() >= MARKET_OPEN:
+        # Ya cerró la sesión de hoy
+        day += timedelta(days=1)
+    day = trading_calendar.next_business_day(day)
 
-    # Verifica si hoy es ese primer día laboral
-    return today == first_day
+    opening = datetime.combine(day, MARKET_OPEN, MARKET_TIMEZONE)
+    return (opening - now).total_seconds()
@@ -0,0 +1,90 @@
+import importlib.util
+import httpx
+from urllib.parse import urlsplit
+from app.core.config import settings
+
+# Un cliente HTTP persistente (con pool de conexiones) por host externo
+_clients: dict[str, httpx.AsyncClient] = {}
+
+# Contador de solicitudes enviadas por host
+_request_counts: dict[str, int] = {}
+
+def host_of(url: str) -> str:
+    """Obtiene el host (netloc) de una URL."""
+    return urlsplit(url).netloc
+
+def _http2_available() -> bool:
+    """Verifica si HTTP/2 está habilitado y el paquete 'h2' está instalado."""
+    return settings.http2_enabled and importlib.util.find_spec("h2") is not None
+
+def _build_client(host: str) -> httpx.AsyncClient:
+    """
+    Construye un cliente con keep-alive y límites de pool configurables.
+    :param host: Host al que apuntará el cliente.
+    :return: Cliente asíncrono de httpx.
+    """
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+    timeout = httpx.Timeout(settings.http_host_timeouts.get(host, settings.http_timeout))
+
+    async def count_request(request: httpx.Request):
+        _request_counts[host] = _request_counts.get(host, 0) + 1
+
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=timeout,
+        http2=_http2_available(),
+        event_hooks={"request": [count_request]},
+    )
+
+def get_client(url: str) -> httpx.AsyncClient:
+    """
+    Devuelve el cliente compartido para el host de la URL, creándolo si no existe.
+    :param url: URL (o URL base) del proveedor.
+    :return: Cliente asíncrono de httpx reutilizable.
+    """
+    host = host_of(url)
+    client = _clients.get(host)
+
+    if client is None or client.is_closed:
+        client = _build_client(host)
+        _clients[host] = client
+
+    return client
+
+async def close_clients() -> None:
+    """Cierra todos los clientes y libera sus conexiones."""
+    clients = list(_clients.values())
+    _clients.clear()
+
+    for client in clients:
+        await client.aclose()
+
+def get_pool_stats() -> dict:
+    """
+    Obtiene estadísticas de los pools de conexiones para dimensionarlos.
+    :return: Diccionario con el estado del pool por host.
+    """
+    stats = {}
+
+    for host, client in _clients.items():
+        # httpcore no expone el pool públicamente, se inspecciona con cuidado
+        pool = getattr(client._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+
+        stats[host] = {
+            "http2": _http2_available(),
+            "max_connections": settings.http_max_connections,
+            "max_keepalive_connections": settings.http_max_keepalive_connections,
+            "connections": len(connections),
+            "active": len(connections) - idle,
+            "idle": idle,
+            "queued_requests": sum(1 for request in getattr(pool, "_requests", []) if request.is_queued()),
+            "requests_sent": _request_counts.get(host, 0),
+        }
+
+    return stats
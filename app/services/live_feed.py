@@ -0,0 +1,160 @@
+import asyncio
+from typing import Optional
+from app.core.config import settings
+from app.services.holiday_checker import is_market_open
+from app.services.market_data import refresh_market_bars
+
+class Subscriber:
+    """
+    Cliente suscrito a uno o más pares (símbolo, temporalidad). Las actualizaciones
+    pendientes se guardan por par y por fecha de vela: si el cliente consume más lento
+    de lo que llegan, las versiones intermedias de una vela se reemplazan por la última,
+    por lo que la memoria queda acotada y el cliente no bloquea al hub.
+    """
+
+    def __init__(self):
+        self._pending: dict[tuple[str, str], dict] = {}
+        self._event = asyncio.Event()
+        self.coalesced = 0
+
+    def offer(self, key: tuple[str, str], kind: str, bars: dict[str, dict]) -> None:
+        """
+        Agrega una actualización pendiente, combinándola con la anterior del mismo par si no se ha entregado.
+        :param kind: 'snapshot' (todas las velas) o 'delta' (solo las velas que cambiaron).
+        :param bars: Velas por fecha.
+        """
+        pending = self._pending.get(key)
+        if pending is None or kind == "snapshot":
+            self._pending[key] = {"kind": kind, "bars": dict(bars)}
+        else:
+            self.coalesced += len(pending["bars"].keys() & bars.keys())
+            pending["bars"].update(bars)
+        self._event.set()
+
+    async def updates(self, timeout: float) -> list[dict]:
+        """
+        Espera las actualizaciones pendientes.
+        :param timeout: Segundos máximos de espera; al vencer se devuelve una lista vacía.
+        :return: Lista de eventos {'event', 'symbol', 'timeFrame', 'bars'} con las velas de la más reciente a la más antigua.
+        """
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+
+        pending, self._pending = self._pending, {}
+        self._event.clear()
+
+        return [
+            {
+                "event": update["kind"],
+                "symbol": symbol,
+                "timeFrame": timeframe,
+                "bars": sorted(update["bars"].values(), key=lambda bar: bar["date"], reverse=True),
+            }
+            for (symbol, timeframe), update in pending.items()
+        ]
+
+class Topic:
+    """Par (símbolo, temporalidad) con sus suscriptores, la tarea que lo consulta y las últimas velas conocidas."""
+
+    def __init__(self):
+        self.subscribers: set[Subscriber] = set()
+        self.bars: Optional[dict[str, dict]] = None
+        self.task: Optional[asyncio.Task] = None
+        self.polls = 0
+        self.errors = 0
+
+class LiveFeedHub:
+    """
+    Reparte las velas de cada par (símbolo, temporalidad) entre todos sus suscriptores.
+    Cada par se consulta una sola vez por intervalo sin importar cuántos clientes
+    escuchen, y la consulta se detiene cuando se va el último suscriptor.
+    """
+
+    def __init__(self):
+        self._topics: dict[tuple[str, str], Topic] = {}
+        self.deltas = 0
+
+    def subscribe(self, subscriber: Subscriber, keys: list[tuple[str, str]]) -> None:
+        """
+        Suscribe un cliente a los pares indicados; si ya hay velas conocidas se le entregan de inmediato.
+        """
+        for key in keys:
+            topic = self._topics.get(key)
+            if topic is None:
+                topic = self._topics[key] = Topic()
+                topic.task = asyncio.ensure_future(self._poll(key, topic))
+
+            topic.subscribers.add(subscriber)
+            if topic.bars is not None:
+                subscriber.offer(key, "snapshot", topic.bars)
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """
+        Retira a un cliente de todos sus pares y detiene la consulta de los que quedan sin suscriptores.
+        """
+        for key, topic in list(self._topics.items()):
+            topic.subscribers.discard(subscriber)
+            if not topic.subscribers:
+                topic.task.cancel()
+                del self._topics[key]
+
+    async def _poll(self, key: tuple[str, str], topic: Topic) -> None:
+        symbol, timeframe = key
+
+        while True:
+            interval = settings.live_poll_interval if is_market_open() else settings.live_poll_interval_closed
+
+            try:
+                # Misma ventana que /market/bulk; se consulta al proveedor aunque la caché esté vigente
+                # y la entrada se reemplaza, así que /market/bulk también recibe las velas nuevas
+                result = await refresh_market_bars(symbol, timeframe, interval)
+                topic.polls += 1
+                if result.get("data"):
+                    self._publish(key, topic, result["data"]["bulk"].to_rows())
+                else:
+                    topic.errors += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                topic.errors += 1
+
+            await asyncio.sleep(interval)
+
+    def _publish(self, key: tuple[str, str], topic: Topic, rows: list[dict]) -> None:
+        bars = {row["date"]: row for row in rows}
+
+        if topic.bars is None:
+            kind, changed = "snapshot", bars
+        else:
+            kind = "delta"
+            changed = {day: bar for day, bar in bars.items() if topic.bars.get(day) != bar}
+
+        topic.bars = bars
+        if not changed:
+            return
+
+        self.deltas += 1
+        for subscriber in topic.subscribers:
+            subscriber.offer(key, kind, changed)
+
+    def stats(self) -> dict:
+        """
+        Obtiene el estado del hub.
+        :return: Diccionario con pares activos, suscriptores y consultas por par.
+        """
+        subscribers = set().union(*(topic.subscribers for topic in self._topics.values()))
+        return {
+            "topics": len(self._topics),
+            "subscribers": len(subscribers),
+            "deltas_published": self.deltas,
+            "coalesced_bars": sum(subscriber.coalesced for subscriber in subscribers),
+            "polls": {
+                f"{symbol}:{timeframe}": {"subscribers": len(topic.subscribers), "polls": topic.polls, "errors": topic.errors}
+                for (symbol, timeframe), topic in self._topics.items()
+            },
+        }
+
+# Hub compartido por todas las conexiones del proceso
+live_feed_hub = LiveFeedHub()
@@ -1,43 +1,194 @@
 import asyncio
+import weakref
 import httpx
-from asyncio import Semaphore
-from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
+from datetime import datetime, timedelta, timezone
 from app.core.config import settings
-from app.services.holiday_checker import is_holiday, is_weekend
-from app.services.transformers import transform_yahoo_data
-from app.utils.analyzers import determine_unusual_volume, determine_seasonality
+from app.services.rate_limiter import limited_get
+from app.services.bar_store import BarStore, bars_from_chart, chart_payload, completed_boundary, has_splits, same_prices
+from app.services.cache import TTLCache
+from app.services.hedging import HedgedRequests
+from app.services.holiday_checker import is_market_open
+from app.services.resampler import period_start_timestamp, resample_yahoo_data
+from app.services.trading_calendar import trading_calendar
+from app.services.transformers import Bars, parse_yahoo_data, render_bulk
+from app.utils.analyzers import determine_unusual_volume, determine_seasonality, seasonality_statistics
+from app.utils.indicators import IndicatorEngine, IndicatorSpec, align_values, history_start
+from app.utils.metrics import stage
 
-# Crear un semáforo global para limitar solicitudes concurrentes
-semaphore = Semaphore(10)
+# Caché compartida de respuestas OHLCV por (símbolo, granularidad, periodo)
+market_data_cache = TTLCache()
 
-async def fetch_market_data_service(symbol: str, timeframe: str, period1: int = None, period2: int = None):
+# Caché de estadísticas de estacionalidad por (símbolo, año, mes)
+seasonality_cache = TTLCache()
+
+# Almacén persistente de velas históricas completas
+bar_store = BarStore()
+
+# Candados por (símbolo, granularidad) para las descargas que escriben en el almacén
+bar_store_locks = weakref.WeakValueDictionary()
+
+# Duplica las descargas que superan el percentil de latencia reciente
+chart_hedger = HedgedRequests()
+
+# Estado incremental de los indicadores técnicos por (símbolo, granularidad, indicador, inicio de la serie)
+indicator_engine = IndicatorEngine()
+
+SECONDS_PER_DAY = 86400
+
+# Estado de cada temporalidad en las consultas con plazo, de mayor a menor gravedad
+FETCH_STATUSES = ("timeout", "upstream_error", "cached_stale", "ok")
+
+# Tamaño aproximado en memoria de una vela transformada (dict con seis campos)
+BAR_SIZE_ESTIMATE = 600
+
+async def fetch_market_data_service(symbol: str, timeframe: str, period1: int = None, period2: int = None, client: httpx.AsyncClient = None, columnar: bool = False, indicators: list[IndicatorSpec] = None, deadline: float = None):
     """
     Obtiene datos de un stock desde Yahoo Finance API, basados en el símbolo y granularidad.
+    Las respuestas se guardan en caché y las solicitudes idénticas concurrentes se resuelven con una sola consulta.
+    :param client: Cliente HTTP a utilizar; por defecto el cliente compartido del host.
+    :param columnar: True para devolver 'bulk' como listas paralelas en lugar de una lista de dicts.
+    :param indicators: Indicadores técnicos a calcular sobre las velas (ver add_indicators).
+    :param deadline: Hora límite (reloj del loop) para obtener las velas; ver fetch_market_bars.
     """
-    try:
-        # Lógica para calcular periodos por defecto
-        if not period1:
-            period1 = int((datetime.now() - timedelta(days=90)).timestamp())
-        if not period2:
-            period2 = int(datetime.now().timestamp())
-
-        url = f"{settings.market_data_api_url}/{symbol}"
-        query_params = {
-            "events": "capitalGain|div|split",
-            "formatted": "true",
-            "includeAdjustedClose": "true",
-            "interval": timeframe,
-            "period1": period1,
-            "period2": period2,
-            "region": "US",
+    # Lógica para calcular periodos por defecto
+    if not period1 or not period2:
+        default_period1, default_period2 = default_market_window()
+        period1 = period1 or default_period1
+        period2 = period2 or default_period2
+
+    # La caché guarda las velas en formato columnar y se convierten al formato pedido
+    transformed_data = await fetch_market_bars(symbol, timeframe, period1, period2, client, deadline)
+
+    transformed_data = await add_indicators(symbol, timeframe, transformed_data, indicators, period2, deadline=deadline)
+    return render_bulk(transformed_data, columnar)
+
+async def add_indicators(symbol: str, timeframe: str, transformed_data: dict, indicators: list[IndicatorSpec] = None, period2: int = None, resampled: bool = False, deadline: float = None) -> dict:
+    """
+    Agrega los indicadores técnicos pedidos como 'indicators': {etiqueta: valores}, con los
+    valores alineados con 'bulk' (de la vela más reciente a la más antigua). Se calculan sobre
+    una historia más larga que la ventana mostrada (ver history_start), por lo que no dependen
+    de period1; si la historia no se puede obtener, los valores son None.
+    :param transformed_data: Resultado de parse_yahoo_data.
+    :param period2: Fin del periodo consultado en timestamp UNIX.
+    :param resampled: True si las velas semanales y mensuales se construyeron con velas diarias.
+    :param deadline: Hora límite (reloj del loop) para obtener la historia.
+    :return: Datos transformados con los indicadores, o sin cambios si no se pidieron o no hay velas.
+    """
+    data = transformed_data.get("data")
+
+    if not indicators or not data or not isinstance(data.get("bulk"), Bars) or not len(data["bulk"]):
+        return transformed_data
+
+    bars = data["bulk"]
+    period1 = history_start(timeframe, bars.timestamps[-1], indicators)
+    history = await fetch_indicator_history(symbol, timeframe, period1, period2 or bars.timestamps[0] + 1, resampled, deadline)
+
+    # Las velas diarias remuestreadas no coinciden con las nativas, por lo que no comparten estado
+    series = f"{timeframe}/resample" if resampled else timeframe
+    complete_before = completed_boundary(timeframe)
+
+    with stage("indicators"):
+        values = {
+            spec.label: (
+                align_values(history, indicator_engine.compute(symbol, series, history, spec, complete_before), bars)
+                if history is not None else [None] * len(bars)
+            )
+            for spec in indicators
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=query_params)
-            response.raise_for_status()
+    return {**transformed_data, "data": {**data, "indicators": values}}
+
+async def fetch_indicator_history(symbol: str, timeframe: str, period1: int, period2: int, resampled: bool = False, deadline: float = None) -> Optional[Bars]:
+    """
+    Obtiene las velas desde period1 para calcular indicadores, pasando por la caché y el almacén de velas.
+    :param resampled: True para construir las velas semanales y mensuales con velas diarias.
+    :return: Velas columnares o None si no se pudieron obtener.
+    """
+    try:
+        result = await fetch_market_bars(symbol, "1d" if resampled else timeframe, period1, period2, deadline=deadline)
+        if resampled and timeframe != "1d":
+            result = resample_yahoo_data(result, timeframe, period1)
+    except Exception:
+        return None
+
+    data = result.get("data")
+    return data["bulk"] if data and isinstance(data.get("bulk"), Bars) else None
+
+async def fetch_market_bars(symbol: str, timeframe: str, period1: int, period2: int, client: httpx.AsyncClient = None, deadline: float = None) -> dict:
+    """
+    Obtiene las velas columnares (resultado de parse_yahoo_data) pasando por la caché.
+    El resultado incluye 'status' (ver FETCH_STATUSES); ante un error o plazo vencido se
+    usan las velas vencidas de la caché, si existen.
+    :param deadline: Hora límite (reloj del loop). Si se indica, la espera se corta al vencer
+        (la descarga sigue en segundo plano y llena la caché).
+    """
+    period1, period2 = normalize_window(period1, period2)
+    key = (symbol, timeframe, period1, period2)
 
-        raw_data = response.json()
-        transformed_data = transform_yahoo_data(raw_data, timeframe)
+    fetch = market_data_cache.get_or_fetch(
+        key,
+        lambda: request_market_data(symbol, timeframe, period1, period2, client),
+        ttl=cache_ttl(timeframe),
+        size_of=estimate_size,
+        cacheable=is_cacheable,
+    )
+    try:
+        if deadline is None:
+            result = await fetch
+        else:
+            result = await asyncio.wait_for(fetch, max(0.0, deadline - asyncio.get_running_loop().time()))
+        status = "ok" if is_cacheable(result) else "upstream_error"
+    except asyncio.TimeoutError:
+        result, status = {"error": "Deadline exceeded while fetching data"}, "timeout"
+
+    if status != "ok":
+        stale = market_data_cache.get_stale(key)
+        if stale is not None:
+            return {**stale, "status": "cached_stale", "staleReason": status}
+
+    return {**result, "status": status}
+
+def default_market_window() -> tuple[int, int]:
+    """
+    Periodo de /api/market cuando no se indica: los últimos 90 días.
+    :return: Tuple con period1 y period2 en timestamp UNIX.
+    """
+    now = datetime.now()
+    return int((now - timedelta(days=90)).timestamp()), int(now.timestamp())
+
+async def refresh_market_bars(symbol: str, timeframe: str, ttl: float, window: tuple[int, int] = None) -> dict:
+    """
+    Vuelve a consultar las velas de una ventana y reemplaza la entrada en caché.
+    :param ttl: Tiempo de vida mínimo de la entrada; se usa el mayor entre este y el TTL normal.
+    :param window: (period1, period2) a consultar; por defecto la ventana de fetch_symbol_data.
+    """
+    period1, period2 = normalize_window(*(window or calculate_periods(timeframe)))
+
+    return await market_data_cache.refresh(
+        (symbol, timeframe, period1, period2),
+        lambda: request_market_data(symbol, timeframe, period1, period2),
+        ttl=max(ttl, cache_ttl(timeframe)),
+        size_of=estimate_size,
+        cacheable=is_cacheable,
+    )
+
+def is_cacheable(result: dict) -> bool:
+    """Indica si una respuesta transformada puede guardarse en caché (no se guardan errores)."""
+    return result.get("error") is None and result.get("data") is not None
+
+async def request_market_data(symbol: str, timeframe: str, period1: int, period2: int, client: httpx.AsyncClient = None) -> dict:
+    """
+    Consulta Yahoo Finance API sin pasar por la caché.
+    Si el almacén de velas está habilitado, solo se descarga el tramo que no está guardado;
+    los símbolos que no pueden formar una ruta del almacén se descargan sin guardarse.
+    """
+    try:
+        if settings.bar_store_enabled and bar_store.accepts(symbol, timeframe):
+            return await fetch_with_bar_store(symbol, timeframe, period1, period2, client)
+
+        raw_data = await download_chart(symbol, timeframe, period1, period2, client)
+        transformed_data = parse_yahoo_data(raw_data, timeframe)
 
         return transformed_data  # Devolver solo los datos transformados
 
@@ -46,12 +197,186 @@ async def fetch_market_data_service(symbol: str, timeframe: str, period1: int =
     except Exception as e:
         return {"error": f"Unexpected error: {str(e)}"}
 
-async def fetch_market_data_service_limited(symbol: str, timeframe: str, period1: int = None, period2: int = None) -> dict:
+async def download_chart(symbol: str, timeframe: str, period1: int, period2: int, client: httpx.AsyncClient = None) -> dict:
+    """
+    Descarga la respuesta cruda de Yahoo Finance para un rango, duplicando la solicitud si tarda más de lo habitual.
+    :return: Diccionario crudo de Yahoo Finance.
+    """
+    return await chart_hedger.run(lambda: request_chart(symbol, timeframe, period1, period2, client))
+
+async def request_chart(symbol: str, timeframe: str, period1: int, period2: int, client: httpx.AsyncClient = None) -> dict:
+    """
+    Hace una solicitud a Yahoo Finance para un rango.
+    :return: Diccionario crudo de Yahoo Finance.
+    """
+    url = f"{settings.market_data_api_url}/{symbol}"
+    query_params = {
+        "events": "capitalGain|div|split",
+        "formatted": "true",
+        "includeAdjustedClose": "true",
+        "interval": timeframe,
+        "period1": period1,
+        "period2": period2,
+        "region": "US",
+    }
+
+    # El limitador del host controla la concurrencia y reintenta ante 429/5xx
+    response = await limited_get(url, client, params=query_params)
+    response.raise_for_status()
+
+    with stage("json_decode"):
+        return response.json()
+
+async def fetch_with_bar_store(symbol: str, timeframe: str, period1: int, period2: int, client: httpx.AsyncClient = None) -> dict:
+    """
+    Obtiene las velas combinando el almacén en disco con el tramo faltante del proveedor.
+    Las consultas que descargan y escriben una misma serie se serializan, para que dos
+    solicitudes concurrentes no agreguen el mismo tramo dos veces.
+    """
+    coverage = bar_store.coverage(symbol, timeframe)
+
+    # Rango completamente guardado: se lee sin esperar a las escrituras (las velas se escriben antes que la cobertura)
+    if coverage and coverage.covered_from <= period1 and period2 <= coverage.covered_to:
+        return read_bar_store(symbol, timeframe, period1, period2, coverage.symbol)
+
+    async with bar_store_lock(symbol, timeframe):
+        return await update_bar_store(symbol, timeframe, period1, period2, client)
+
+def bar_store_lock(symbol: str, timeframe: str) -> asyncio.Lock:
+    """
+    Obtiene el candado de una serie del almacén; se libera de memoria cuando nadie lo usa.
+    """
+    key = (symbol.upper(), timeframe)
+    lock = bar_store_locks.get(key)
+    if lock is None:
+        lock = bar_store_locks[key] = asyncio.Lock()
+    return lock
+
+def read_bar_store(symbol: str, timeframe: str, period1: int, period2: int, stored_symbol: str) -> dict:
+    """
+    Lee un rango guardado en el almacén y lo transforma como una respuesta del proveedor.
+    """
+    with stage("bar_store_read"):
+        bars = bar_store.read(symbol, timeframe, period1, period2)
+    return parse_yahoo_data(chart_payload(stored_symbol, bars), timeframe)
+
+async def update_bar_store(symbol: str, timeframe: str, period1: int, period2: int, client: httpx.AsyncClient = None) -> dict:
     """
-    Realiza solicitudes con límite de concurrencia usando un semáforo.
+    Descarga el tramo que falta en el almacén y lo guarda; se ejecuta con el candado de la serie.
     """
-    async with semaphore:  # Bloquea el acceso si ya hay 10 solicitudes activas
-        return await fetch_market_data_service(symbol, timeframe, period1, period2)
+    # La cobertura se lee de nuevo: otra solicitud pudo extenderla mientras se esperaba el candado
+    coverage = bar_store.coverage(symbol, timeframe)
+    boundary = completed_boundary(timeframe)
+
+    # Rango completamente guardado: no se consulta al proveedor
+    if coverage and coverage.covered_from <= period1 and period2 <= coverage.covered_to:
+        return read_bar_store(symbol, timeframe, period1, period2, coverage.symbol)
+
+    # Rango que continúa lo guardado: descargar solo el tramo posterior
+    if coverage and coverage.covered_from <= period1 <= coverage.covered_to:
+        with stage("bar_store_read"):
+            stored_bars = bar_store.read(symbol, timeframe, period1, coverage.covered_to)
+            last_bar = bar_store.last(symbol, timeframe)
+
+        # El tramo empieza en la última vela guardada, para comprobar que el proveedor no ajustó lo guardado
+        tail_from = last_bar[0] if last_bar else coverage.covered_to
+        raw_data = await download_chart(symbol, timeframe, tail_from, period2, client)
+        stored_symbol, tail_bars = bars_from_chart(raw_data)
+
+        if has_splits(raw_data) or not matches_stored(tail_bars, last_bar):
+            return await rewrite_bar_store(symbol, timeframe, period1, period2, coverage.covered_from, client)
+
+        tail_bars = [bar for bar in tail_bars if bar[0] >= coverage.covered_to]
+
+        covered_to = min(period2, boundary)
+        if covered_to > coverage.covered_to:
+            complete_bars = [bar for bar in tail_bars if bar[0] < covered_to]
+            save_bars(bar_store.append, symbol, timeframe, covered_to, complete_bars)
+
+        return parse_yahoo_data(chart_payload(stored_symbol, stored_bars + tail_bars), timeframe)
+
+    # Rango nuevo o anterior a lo guardado: descargar completo
+    raw_data = await download_chart(symbol, timeframe, period1, period2, client)
+    stored_symbol, bars = bars_from_chart(raw_data)
+    covered_to = min(period2, boundary)
+    complete_bars = [bar for bar in bars if bar[0] < covered_to]
+
+    if coverage is None:
+        save_bars(bar_store.write, symbol, timeframe, stored_symbol, period1, covered_to, complete_bars)
+    elif period1 < coverage.covered_from <= period2:
+        # Extender hacia atrás conservando las velas guardadas posteriores, salvo que el proveedor
+        # haya ajustado lo guardado (la última vela guardada dentro de la descarga ya no coincide)
+        overlap = bar_store.read(symbol, timeframe, coverage.covered_from, min(covered_to, coverage.covered_to))
+        if coverage.covered_to > covered_to and matches_stored(bars, overlap[-1] if overlap else None):
+            complete_bars += bar_store.read(symbol, timeframe, covered_to, coverage.covered_to)
+            covered_to = coverage.covered_to
+        save_bars(bar_store.write, symbol, timeframe, stored_symbol, period1, covered_to, complete_bars)
+
+    return parse_yahoo_data(raw_data, timeframe)
+
+def matches_stored(bars: list[tuple], stored_bar: tuple = None) -> bool:
+    """
+    Verifica que la vela guardada de referencia siga igual en las velas descargadas. Yahoo
+    ajusta retroactivamente los precios por splits, así que una diferencia indica que lo
+    guardado quedó desfasado. Si la vela no viene en la descarga no hay con qué comparar.
+    """
+    if stored_bar is None:
+        return True
+    downloaded = next((bar for bar in bars if bar[0] == stored_bar[0]), None)
+    return downloaded is None or same_prices(downloaded, stored_bar)
+
+async def rewrite_bar_store(symbol: str, timeframe: str, period1: int, period2: int, covered_from: int, client: httpx.AsyncClient = None) -> dict:
+    """
+    Vuelve a descargar la serie completa desde el inicio de la cobertura y la reescribe,
+    cuando el proveedor ajustó precios ya guardados (ej. por un split).
+    :return: Datos transformados desde period1.
+    """
+    raw_data = await download_chart(symbol, timeframe, covered_from, period2, client)
+    stored_symbol, bars = bars_from_chart(raw_data)
+    covered_to = min(period2, completed_boundary(timeframe))
+
+    save_bars(bar_store.write, symbol, timeframe, stored_symbol, covered_from, covered_to, [bar for bar in bars if bar[0] < covered_to])
+    return parse_yahoo_data(chart_payload(stored_symbol, [bar for bar in bars if bar[0] >= period1]), timeframe)
+
+def save_bars(operation, *args) -> None:
+    """
+    Ejecuta una escritura en el almacén de velas; si el disco no lo permite se continúa sin guardar.
+    """
+    try:
+        operation(*args)
+    except OSError:
+        pass
+
+def normalize_window(period1: int, period2: int) -> tuple[int, int]:
+    """
+    Alinea el periodo a días completos (UTC) para que solicitudes del mismo rango compartan la llave de caché.
+    :return: Tuple con period1 al inicio de su día y period2 al final de su día.
+    """
+    period1 -= period1 % SECONDS_PER_DAY
+    if period2 % SECONDS_PER_DAY:
+        period2 += SECONDS_PER_DAY - period2 % SECONDS_PER_DAY
+    return period1, period2
+
+def cache_ttl(timeframe: str) -> float:
+    """
+    Calcula el tiempo de vida en caché según la granularidad y el horario de mercado.
+    :param timeframe: '1d', '1wk', '1mo'
+    :return: TTL en segundos.
+    """
+    if timeframe == "1mo":
+        return settings.cache_ttl_1mo
+    if timeframe == "1wk":
+        return settings.cache_ttl_1wk
+    if is_market_open():
+        return settings.cache_ttl_market_open
+    return settings.cache_ttl_market_closed
+
+def estimate_size(result: dict) -> int:
+    """
+    Estima el tamaño en memoria de una respuesta transformada.
+    """
+    bars = (result.get("data") or {}).get("bulk") or ()
+    return BAR_SIZE_ESTIMATE * (len(bars) + 1)
 
 def calculate_periods(timeframe: str) -> tuple[int, int]:
     """
@@ -64,11 +389,7 @@ def calculate_periods(timeframe: str) -> tuple[int, int]:
 
     if timeframe == "1d":
         # Retrocede hasta encontrar los últimos 10 días hábiles
-        business_days = 0
-        while business_days < 11:
-            start -= timedelta(days=1)
-            if not is_weekend(start) and not is_holiday(start):
-                business_days += 1
+        start = datetime.combine(trading_calendar.business_days_back(now.date(), 11), now.time())
 
     elif timeframe == "1wk":
         # Retrocede 4 semanas hábiles (4 semanas completas)
@@ -84,70 +405,268 @@ def calculate_periods(timeframe: str) -> tuple[int, int]:
     period2 = int(now.timestamp())
     return period1, period2
 
-async def fetch_symbol_data(symbol: str) -> dict:
+async def fetch_symbol_data(symbol: str, columnar: bool = False, mode: str = "upstream", indicators: list[IndicatorSpec] = None, deadline: float = None) -> dict:
     """
     Realiza tres consultas para un símbolo con temporalidades '1d', '1wk', y '1mo'.
     :param symbol: Símbolo a consultar.
+    :param columnar: True para devolver 'bulk' como listas paralelas.
+    :param mode: 'upstream' para consultar cada temporalidad o 'resample' para derivarlas de una sola consulta diaria.
+    :param indicators: Indicadores técnicos a calcular en cada temporalidad.
+    :param deadline: Hora límite (reloj del loop) de las consultas.
     :return: Resultados para las tres consultas.
     """
+    if mode == "resample":
+        return await fetch_symbol_data_resampled(symbol, columnar, indicators, deadline)
+
     timeframes = ["1d", "1wk", "1mo"]
     tasks = []
 
     # Crear tareas para cada temporalidad
     for tiemframe in timeframes:
         period1, period2 = calculate_periods(tiemframe)
-        tasks.append(fetch_market_data_service_limited(symbol, tiemframe, period1, period2))
+        tasks.append(fetch_market_data_service(symbol, tiemframe, period1, period2, columnar=columnar, indicators=indicators, deadline=deadline))
 
     # Ejecutar todas las tareas de forma concurrente
     results = await asyncio.gather(*tasks, return_exceptions=True)
 
     # Formatear los resultados
     formatted_results = {
-        tiemframe: result if not isinstance(result, Exception) else {"error": str(result)}
+        tiemframe: result if not isinstance(result, Exception) else failed_result(result)
         for tiemframe, result in zip(timeframes, results)
     }
 
     return {"symbol": symbol, "data": formatted_results}
 
-async def fetch_multiple_market_data_service(symbols: list[str]) -> list[dict]:
+async def fetch_symbol_data_resampled(symbol: str, columnar: bool = False, indicators: list[IndicatorSpec] = None, deadline: float = None) -> dict:
+    """
+    Obtiene las temporalidades '1d', '1wk' y '1mo' de un símbolo con una sola consulta diaria,
+    construyendo las velas semanales y mensuales localmente.
+    :param symbol: Símbolo a consultar.
+    :param columnar: True para devolver 'bulk' como listas paralelas.
+    :param indicators: Indicadores técnicos a calcular en cada temporalidad.
+    :param deadline: Hora límite (reloj del loop); las tres temporalidades comparten el 'status' de la consulta diaria.
+    :return: Resultados para las tres temporalidades.
+    """
+    windows, (period1, period2) = resample_windows()
+
+    try:
+        daily_data = await fetch_market_bars(symbol, "1d", period1, period2, deadline=deadline)
+    except Exception as e:
+        daily_data = failed_result(e)
+
+    results = {
+        "1d": daily_data,
+        "1wk": resample_yahoo_data(daily_data, "1wk", windows["1wk"][0]),
+        "1mo": resample_yahoo_data(daily_data, "1mo", windows["1mo"][0]),
+    }
+
+    # Recortar las velas diarias a la ventana original de '1d'
+    if daily_data.get("data"):
+        data = daily_data["data"]
+        results["1d"] = {**daily_data, "data": {**data, "bulk": data["bulk"].since(windows["1d"][0])}}
+
+    # Las velas semanales y mensuales se construyen de nuevo, sin el estado de la consulta diaria
+    results = {timeframe: {**result, "status": daily_data["status"]} for timeframe, result in results.items()}
+
+    if indicators:
+        results = dict(zip(results, await asyncio.gather(*(
+            add_indicators(symbol, timeframe, result, indicators, period2, resampled=True, deadline=deadline)
+            for timeframe, result in results.items()
+        ))))
+
+    return {
+        "symbol": symbol,
+        "data": {timeframe: render_bulk(result, columnar) for timeframe, result in results.items()},
+    }
+
+def resample_windows() -> tuple[dict[str, tuple[int, int]], tuple[int, int]]:
+    """
+    Calcula las ventanas del modo resample.
+    :return: Tuple con la ventana de cada temporalidad y la de la consulta diaria que las cubre.
+    """
+    windows = {timeframe: normalize_window(*calculate_periods(timeframe)) for timeframe in ("1d", "1wk", "1mo")}
+
+    # La consulta diaria cubre desde el inicio del periodo más antiguo requerido
+    period1 = min(period_start_timestamp(start // SECONDS_PER_DAY, timeframe) for timeframe, (start, _) in windows.items())
+    return windows, (period1, windows["1d"][1])
+
+def failed_result(error: Exception) -> dict:
+    """
+    Construye el resultado de una consulta que lanzó una excepción.
+    """
+    return {"error": str(error), "status": "upstream_error"}
+
+async def fetch_multiple_market_data_service(symbols: list[str], columnar: bool = False, mode: str = "upstream", indicators: list[IndicatorSpec] = None, deadline: float = None) -> list[dict]:
     """
     Obtiene datos para múltiples símbolos concurrentemente, con tres consultas por símbolo.
     :param symbols: Lista de símbolos a consultar.
-    :return: Resultados combinados y formateados para todos los símbolos.
+    :param columnar: True para devolver cada temporalidad como listas paralelas.
+    :param mode: 'upstream' (tres consultas por símbolo) o 'resample' (una consulta diaria por símbolo).
+    :param indicators: Indicadores técnicos a calcular en cada temporalidad.
+    :param deadline: Hora límite (reloj del loop); lo que no llegue a tiempo se entrega vacío
+        o con las velas vencidas de la caché. Cada símbolo incluye su 'status' con o sin plazo.
+    :return: Resultados combinados y formateados para todos los símbolos, en el orden pedido.
     """
     # Crear tareas asíncronas para cada símbolo
-    tasks = [fetch_symbol_data(symbol) for symbol in symbols]
+    tasks = [fetch_symbol_data(symbol, columnar, mode, indicators, deadline) for symbol in symbols]
 
     # Ejecutar todas las tareas de forma concurrente
     raw_results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    # Formatear los resultados
-    formatted_results = []
-    for result in raw_results:
-        if isinstance(result, Exception):
-            continue  # Saltar errores en este nivel, manejar en el endpoint si es necesario
-        
-        # Formatear cada resultado al formato esperado
-        symbol_data = {
-            "symbol": result["symbol"],
-            "temporalities": {
-                "day": result["data"].get("1d", {}).get("data", {}).get("bulk", []),
-                "week": result["data"].get("1wk", {}).get("data", {}).get("bulk", []),
-                "month": result["data"].get("1mo", {}).get("data", {}).get("bulk", []),
+
+    # Formatear los resultados; un símbolo que falló por completo se informa con sus errores
+    return [
+        format_symbol_data(result if not isinstance(result, Exception) else failed_symbol_data(symbol, result))
+        for symbol, result in zip(symbols, raw_results)
+    ]
+
+def failed_symbol_data(symbol: str, error: Exception) -> dict:
+    """
+    Construye el resultado de fetch_symbol_data para un símbolo que lanzó una excepción.
+    """
+    return {"symbol": symbol, "data": {timeframe: failed_result(error) for timeframe in ("1d", "1wk", "1mo")}}
+
+def format_symbol_data(result: dict) -> dict:
+    """
+    Formatea el resultado de fetch_symbol_data al formato de respuesta por símbolo.
+    Si se pidieron indicadores, se agregan en 'indicators' con las mismas temporalidades.
+    Incluye 'status' (el más grave de las temporalidades), 'statuses' por temporalidad
+    y 'errors' de las temporalidades que fallaron.
+    """
+    temporalities = {"day": "1d", "week": "1wk", "month": "1mo"}
+    results = {name: result["data"].get(timeframe, {}) for name, timeframe in temporalities.items()}
+    data = {name: values.get("data") or {} for name, values in results.items()}
+
+    formatted = {
+        "symbol": result["symbol"],
+        "temporalities": {name: values.get("bulk", []) for name, values in data.items()},
+    }
+
+    if any("indicators" in values for values in data.values()):
+        formatted["indicators"] = {name: values.get("indicators", {}) for name, values in data.items()}
+
+    # Una temporalidad sin 'status' (resultado vacío) se informa como error del proveedor
+    statuses = {name: values.get("status", "upstream_error") for name, values in results.items()}
+    formatted["status"] = min(statuses.values(), key=FETCH_STATUSES.index)
+    formatted["statuses"] = statuses
+
+    errors = {name: values["error"] for name, values in results.items() if values.get("error")}
+    if errors:
+        formatted["errors"] = errors
+
+    return formatted
+
+def count_statuses(results: list[dict]) -> dict:
+    """
+    Cuenta los símbolos por 'status' en resultados de format_symbol_data.
+    :return: Diccionario con la cantidad de símbolos por estado (incluye los estados sin símbolos).
+    """
+    counts = dict.fromkeys(reversed(FETCH_STATUSES), 0)
+    for result in results:
+        counts[result["status"]] += 1
+    return counts
+
+async def stream_multiple_market_data_service(symbols: list[str], columnar: bool = False, mode: str = "upstream", indicators: list[IndicatorSpec] = None, deadline: float = None) -> AsyncIterator[dict]:
+    """
+    Obtiene datos para múltiples símbolos y entrega cada uno en cuanto termina (orden de finalización).
+    Al final se entrega un resumen con los símbolos que fallaron.
+    :param symbols: Lista de símbolos a consultar.
+    :param columnar: True para devolver cada temporalidad como listas paralelas.
+    :param mode: 'upstream' (tres consultas por símbolo) o 'resample' (una consulta diaria por símbolo).
+    :param indicators: Indicadores técnicos a calcular en cada temporalidad.
+    :param deadline: Hora límite (reloj del loop) de las consultas; cada registro incluye su 'status' y el resumen los cuenta.
+    :return: Iterador asíncrono de resultados por símbolo seguido del resumen.
+    """
+    async def fetch(symbol: str) -> dict:
+        try:
+            return await fetch_symbol_data(symbol, columnar, mode, indicators, deadline)
+        except Exception as e:
+            return failed_symbol_data(symbol, e)
+
+    tasks = [asyncio.ensure_future(fetch(symbol)) for symbol in symbols]
+    failures = []
+    statuses = count_statuses([])
+
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            result = await next_result
+
+            errors = {
+                timeframe: data["error"]
+                for timeframe, data in result["data"].items()
+                if data.get("error")
             }
-        }
-        formatted_results.append(symbol_data)
-    
-    return formatted_results
+            if errors:
+                failures.append({"symbol": result["symbol"], "errors": errors})
+
+            record = format_symbol_data(result)
+            statuses[record["status"]] += 1
+            yield record
 
-async def fetch_customized_data_service(symbols: list[str]) -> list[dict]:
+        yield {"summary": {"requested": len(symbols), "failed": failures, "statuses": statuses}}
+    finally:
+        # Cancelar las consultas pendientes si el cliente se desconecta
+        for task in tasks:
+            task.cancel()
+
+async def fetch_seasonality_statistics(symbol: str) -> dict[int, dict]:
+    """
+    Obtiene las estadísticas de estacionalidad por mes calendario con caché por (símbolo, mes).
+    La entrada expira al cambiar de mes, cuando se completa una vela mensual; los fallos no se guardan.
+    :param symbol: Símbolo a consultar.
+    :return: Estadísticas por mes (ver seasonality_statistics) o vacío si no se obtuvieron las velas.
+    """
+    now = datetime.now()
+
+    return await seasonality_cache.get_or_fetch(
+        (symbol, now.year, now.month),
+        lambda: compute_seasonality(symbol, now),
+        ttl=seconds_until_next_month(now),
+        cacheable=bool,
+    )
+
+async def compute_seasonality(symbol: str, now: datetime) -> dict[int, dict]:
+    """
+    Calcula la estacionalidad con las velas mensuales de los últimos años, obtenidas por el
+    mismo camino que el resto de los datos de mercado (caché y almacén de velas).
+    :return: Estadísticas por mes o vacío si no se obtuvieron las velas.
+    """
+    # Inicio fijo (1 de enero) para que el almacén reutilice la historia guardada
+    period1 = int(datetime(now.year - settings.seasonality_years, 1, 1, tzinfo=timezone.utc).timestamp())
+    monthly_data = await fetch_market_bars(symbol, "1mo", period1, int(now.timestamp()))
+
+    data = monthly_data.get("data")
+    if not data or not isinstance(data.get("bulk"), Bars):
+        return {}
+
+    return seasonality_statistics(data["bulk"])
+
+def seconds_until_next_month(now: datetime) -> float:
+    """
+    Calcula los segundos que faltan para el inicio del mes siguiente.
+    """
+    next_month = (now.replace(day=1, hour=0, minute=0, second=0, microsecond=0) + timedelta(days=32)).replace(day=1)
+    return (next_month - now).total_seconds()
+
+async def fetch_customized_data_service(symbols: list[str], seasonality_detail: bool = False) -> list[dict]:
     """
     Servicio para obtener y manipular datos personalizados de mercado.
+    La estacionalidad se consulta en paralelo con los datos OHLCV.
     :param symbols: Lista de símbolos a procesar.
+    :param seasonality_detail: True para agregar las estadísticas de estacionalidad de cada mes.
     :return: Lista de resultados personalizados por símbolo.
     """
-    # Obtener datos base para todos los símbolos
-    raw_results = await fetch_multiple_market_data_service(symbols)
+    # Lanzar la estacionalidad de todos los símbolos antes de esperar los datos base
+    seasonality_tasks = {symbol: asyncio.ensure_future(fetch_seasonality_statistics(symbol)) for symbol in symbols}
+    current_month = datetime.now().month
+
+    try:
+        # Obtener datos base para todos los símbolos
+        raw_results = await fetch_multiple_market_data_service(symbols)
+        if seasonality_tasks:
+            await asyncio.wait(seasonality_tasks.values())
+    finally:
+        for task in seasonality_tasks.values():
+            task.cancel()
 
     customized_results = []
 
@@ -159,15 +678,22 @@ async def fetch_customized_data_service(symbols: list[str]) -> list[dict]:
         unusual_volume = determine_unusual_volume({"bulk": day_data})
 
         # Determinar la estacionalidad
-        seasonality = await determine_seasonality(symbol)
+        seasonality_task = seasonality_tasks[symbol]
+        statistics = seasonality_task.result() if seasonality_task.exception() is None else {}
+        seasonality = determine_seasonality(statistics, current_month, settings.seasonality_min_samples)
+
+        customized_data = {
+            "unusual_volume": unusual_volume,
+            "seasonality": seasonality
+        }
+        if seasonality_detail:
+            # Llaves de texto ("1" a "12") para serializar como objeto JSON
+            customized_data["seasonality_stats"] = {str(month): stats for month, stats in statistics.items()}
 
         # Agregar solo los datos relevantes
         customized_results.append({
             "symbol": symbol,
-            "customized_data": {
-                "unusual_volume": unusual_volume,
-                "seasonality": seasonality
-            }
+            "customized_data": customized_data
         })
 
     return customized_results
@@ -0,0 +1,184 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from app.core.config import settings
+from app.services.holiday_checker import MARKET_CLOSE, MARKET_OPEN, MARKET_TIMEZONE, is_market_open
+from app.services.market_data import calculate_periods, default_market_window, fetch_seasonality_statistics, normalize_window, refresh_market_bars, resample_windows
+from app.services.trading_calendar import EARLY_CLOSE, trading_calendar
+from app.utils.metrics import PREFETCH_REFRESHES
+
+# Segundos de margen tras la medianoche UTC antes de actualizar las nuevas ventanas
+DAY_CHANGE_DELAY = 5
+
+class PrefetchScheduler:
+    """
+    Mantiene precargada en la caché de datos de mercado una lista de símbolos y
+    temporalidades. Las actualizaciones se programan según el calendario de la
+    bolsa: antes de cada apertura (el día en que cambian las reglas de la primera
+    semana o mes hábil), cada 'prefetch_interval' segundos durante la sesión,
+    poco después del cierre y al cambio de día UTC (cuando cambia la ventana
+    de las llaves de caché). Se precargan las ventanas de /market/bulk (ambos modos)
+    y la de /market sin periodo (ver prefetch_windows). Cada entrada se guarda con
+    un TTL que alcanza hasta la siguiente actualización, para que las solicitudes
+    no esperen al proveedor. También deja calculada la estacionalidad del mes de cada símbolo.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.next_run_at: Optional[datetime] = None
+        self.last_run_started_at: Optional[datetime] = None
+        self.last_run_duration = 0.0
+
+        # Por (símbolo, temporalidad): última actualización exitosa y último error
+        self._refreshed_at: dict[tuple[str, str], float] = {}
+        self._errors: dict[tuple[str, str], str] = {}
+
+        # Contadores
+        self.runs = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    def start(self) -> None:
+        """Inicia el ciclo de precarga si hay una lista de símbolos configurada."""
+        if settings.prefetch_watchlist and self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Detiene el ciclo de precarga."""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        # La primera actualización se hace al iniciar para llegar con la caché caliente
+        while True:
+            now = datetime.now(MARKET_TIMEZONE)
+            self.next_run_at = next_run(now)
+            await self.refresh_all((self.next_run_at - now).total_seconds() + settings.prefetch_grace)
+
+            await asyncio.sleep(max(0.0, (self.next_run_at - datetime.now(MARKET_TIMEZONE)).total_seconds()))
+
+    async def refresh_all(self, ttl: float) -> None:
+        """
+        Actualiza todas las combinaciones de símbolo y temporalidad, con concurrencia acotada
+        para dejar capacidad del limitador a las solicitudes de los usuarios.
+        :param ttl: Tiempo de vida de las entradas actualizadas.
+        """
+        started = time.monotonic()
+        self.last_run_started_at = datetime.now(timezone.utc)
+        self.runs += 1
+        semaphore = asyncio.Semaphore(settings.prefetch_concurrency)
+
+        async def refresh(symbol: str, timeframe: str) -> None:
+            async with semaphore:
+                error = None
+                for window in prefetch_windows(timeframe):
+                    try:
+                        result = await refresh_market_bars(symbol, timeframe, ttl, window)
+                        error = result.get("error") if result.get("data") is None else None
+                    except Exception as e:
+                        error = str(e) or type(e).__name__
+                    if error:
+                        break
+
+            key = (symbol, timeframe)
+            if error:
+                self.failures += 1
+                self._errors[key] = error
+                PREFETCH_REFRESHES.inc(timeframe, "error")
+            else:
+                self.refreshes += 1
+                self._refreshed_at[key] = time.time()
+                self._errors.pop(key, None)
+                PREFETCH_REFRESHES.inc(timeframe, "ok")
+
+        async def precompute_seasonality(symbol: str) -> None:
+            # Solo consulta al proveedor la primera vez en el mes; después es un acierto de caché
+            async with semaphore:
+                try:
+                    await fetch_seasonality_statistics(symbol)
+                except Exception:
+                    pass
+
+        await asyncio.gather(*(
+            refresh(symbol, timeframe)
+            for symbol in settings.prefetch_watchlist
+            for timeframe in settings.prefetch_timeframes
+        ), *(precompute_seasonality(symbol) for symbol in settings.prefetch_watchlist))
+        self.last_run_duration = time.monotonic() - started
+
+    def max_lag(self) -> Optional[float]:
+        """
+        Segundos desde la actualización exitosa más antigua de la lista (None si alguna nunca se actualizó).
+        """
+        keys = [(symbol, timeframe) for symbol in settings.prefetch_watchlist for timeframe in settings.prefetch_timeframes]
+        if not keys or any(key not in self._refreshed_at for key in keys):
+            return None
+        return time.time() - min(self._refreshed_at[key] for key in keys)
+
+    def stats(self) -> dict:
+        """
+        Obtiene el estado de la precarga.
+        :return: Diccionario con la programación, el retraso máximo y los errores vigentes.
+        """
+        lag = self.max_lag()
+        return {
+            "enabled": self._task is not None,
+            "symbols": len(settings.prefetch_watchlist),
+            "timeframes": settings.prefetch_timeframes,
+            "next_run_at": self.next_run_at.isoformat() if self.next_run_at else None,
+            "last_run_started_at": self.last_run_started_at.isoformat() if self.last_run_started_at else None,
+            "last_run_duration_s": round(self.last_run_duration, 3),
+            "max_lag_s": round(lag, 3) if lag is not None else None,
+            "runs": self.runs,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "errors": {f"{symbol}:{timeframe}": error for (symbol, timeframe), error in self._errors.items()},
+        }
+
+def prefetch_windows(timeframe: str) -> list[tuple[int, int]]:
+    """
+    Ventanas de caché que se precargan para una temporalidad: la de /market/bulk,
+    la de /market sin periodo y, en '1d', la consulta diaria del modo resample si está habilitado.
+    :return: Lista de (period1, period2) normalizados y sin repetir.
+    """
+    windows = [calculate_periods(timeframe), default_market_window()]
+    if timeframe == "1d" and settings.resample_mode_enabled:
+        windows.append(resample_windows()[1])
+    return list(dict.fromkeys(normalize_window(*window) for window in windows))
+
+def next_run(now: datetime) -> datetime:
+    """
+    Calcula la próxima actualización: el siguiente evento del calendario (antes de la
+    apertura, después del cierre o cambio de día UTC) o el intervalo intradía si la
+    sesión está abierta.
+    :param now: Fecha y hora actual con zona horaria.
+    """
+    now = now.astimezone(MARKET_TIMEZONE)
+    today = now.date()
+    candidates = []
+
+    # Eventos del día hábil de hoy (si lo es) y del siguiente
+    for day in {trading_calendar.next_business_day(today), trading_calendar.next_business_day(today + timedelta(days=1))}:
+        close = EARLY_CLOSE if trading_calendar.is_early_close(day) else MARKET_CLOSE
+        candidates.append(datetime.combine(day, MARKET_OPEN, MARKET_TIMEZONE) - timedelta(seconds=settings.prefetch_preopen_lead))
+        candidates.append(datetime.combine(day, close, MARKET_TIMEZONE) + timedelta(seconds=settings.prefetch_after_close_delay))
+
+    # Las ventanas de calculate_periods se alinean a días UTC
+    utc_midnight = datetime.combine(now.astimezone(timezone.utc).date() + timedelta(days=1), datetime.min.time(), timezone.utc)
+    candidates.append(utc_midnight + timedelta(seconds=DAY_CHANGE_DELAY))
+
+    if is_market_open(now):
+        candidates.append(now + timedelta(seconds=settings.prefetch_interval))
+
+    return min(candidate for candidate in candidates if candidate > now)
+
+# Programador compartido, iniciado desde el ciclo de vida de la aplicación
+prefetch_scheduler = PrefetchScheduler()
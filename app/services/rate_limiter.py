@@ -0,0 +1,224 @@
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Optional
+import httpx
+from app.core.config import settings
+from app.services.http_clients import get_client, host_of
+from app.utils.metrics import LIMITER_WAIT, UPSTREAM_PAYLOAD_BYTES, UPSTREAM_RESPONSES, record_stage, stage
+
+# Respuestas que indican saturación del proveedor y se reintentan
+THROTTLE_STATUSES = {429, 500, 502, 503, 504}
+
+class AdaptiveLimiter:
+    """
+    Limitador por host que combina un token bucket (solicitudes por segundo)
+    con concurrencia adaptativa tipo AIMD: la concurrencia crece de forma
+    aditiva con respuestas sanas y se reduce de forma multiplicativa ante
+    429/5xx. Un 'Retry-After' bloquea nuevas solicitudes hasta su vencimiento.
+    Sin tasa configurada el token bucket no se aplica.
+    """
+
+    def __init__(self, host: str):
+        self.host = host
+        self.limit = float(settings.rate_limit_initial_concurrency)
+        self.min_limit = settings.rate_limit_min_concurrency
+        self.max_limit = settings.rate_limit_max_concurrency
+        self.rate = settings.rate_limit_requests_per_second
+        self.burst = settings.rate_limit_burst
+
+        self.tokens = float(self.burst)
+        self.in_flight = 0
+        self.queued = 0
+        self.blocked_until = 0.0
+
+        self._refilled_at = time.monotonic()
+        self._decreased_at = 0.0
+        self._condition = asyncio.Condition()
+        self._waits = deque(maxlen=1000)
+
+        # Contadores
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Espera un lugar de concurrencia y un token antes de enviar una solicitud.
+        """
+        started = time.monotonic()
+
+        async with self._condition:
+            self.queued += 1
+            try:
+                await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            finally:
+                self.queued -= 1
+            self.in_flight += 1
+
+        try:
+            await self._take_token()
+            wait = time.monotonic() - started
+            self._waits.append(wait)
+            LIMITER_WAIT.observe(wait, self.host)
+            record_stage("limiter_wait", wait)
+            self.requests += 1
+            yield
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    async def _take_token(self) -> None:
+        """Consume un token del bucket, esperando si no hay disponibles o si hay un Retry-After vigente."""
+        while True:
+            now = time.monotonic()
+
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+
+            if self.rate is None:
+                return
+
+            self.tokens = min(self.burst, self.tokens + (now - self._refilled_at) * self.rate)
+            self._refilled_at = now
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def record(self, status: Optional[int], retry_after: Optional[float] = None) -> None:
+        """
+        Ajusta la concurrencia según el resultado de una solicitud.
+        :param status: Código HTTP recibido o None si falló la conexión.
+        :param retry_after: Segundos indicados por el encabezado Retry-After.
+        """
+        now = time.monotonic()
+
+        if status is None or status in THROTTLE_STATUSES:
+            self.throttled += 1
+
+            # Reducir como máximo una vez por intervalo para no colapsar ante una ráfaga de errores
+            if now - self._decreased_at >= settings.rate_limit_decrease_interval:
+                self.limit = max(self.min_limit, self.limit * settings.rate_limit_decrease_factor)
+                self._decreased_at = now
+
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def stats(self) -> dict:
+        """
+        Obtiene los límites actuales y los tiempos de espera en cola.
+        :return: Diccionario con el estado del limitador.
+        """
+        waits = sorted(self._waits)
+
+        def percentile(fraction: float) -> float:
+            return round(waits[min(len(waits) - 1, int(fraction * len(waits)))] * 1000, 3) if waits else 0.0
+
+        return {
+            "concurrency_limit": int(self.limit),
+            "concurrency_limit_exact": round(self.limit, 3),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "requests_per_second": self.rate,
+            "tokens": round(self.tokens, 3),
+            "blocked_for_s": round(max(0.0, self.blocked_until - time.monotonic()), 3),
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "wait_ms_p50": percentile(0.5),
+            "wait_ms_p95": percentile(0.95),
+            "wait_ms_max": percentile(1.0),
+        }
+
+# Un limitador por host externo
+_limiters: dict[str, AdaptiveLimiter] = {}
+
+def get_limiter(url: str) -> AdaptiveLimiter:
+    """
+    Devuelve el limitador del host de la URL, creándolo si no existe.
+    """
+    host = host_of(url)
+    limiter = _limiters.get(host)
+
+    if limiter is None:
+        limiter = AdaptiveLimiter(host)
+        _limiters[host] = limiter
+
+    return limiter
+
+def get_limiter_stats() -> dict:
+    """
+    Obtiene el estado de los limitadores por host.
+    """
+    return {host: limiter.stats() for host, limiter in _limiters.items()}
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Interpreta el encabezado Retry-After (segundos o fecha HTTP).
+    :return: Segundos a esperar o None si no es válido.
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Calcula la espera exponencial con jitter completo para un reintento.
+    """
+    return random.uniform(0, min(settings.rate_limit_backoff_max, settings.rate_limit_backoff_base * 2 ** attempt))
+
+async def limited_get(url: str, client: httpx.AsyncClient = None, **kwargs) -> httpx.Response:
+    """
+    Realiza un GET respetando el limitador del host y reintentando ante 429/5xx o fallas de conexión.
+    :param url: URL a consultar.
+    :param client: Cliente HTTP a utilizar; por defecto el cliente compartido del host.
+    :return: Última respuesta recibida.
+    """
+    client = client or get_client(url)
+    limiter = get_limiter(url)
+
+    for attempt in range(settings.rate_limit_max_retries + 1):
+        last_attempt = attempt == settings.rate_limit_max_retries
+
+        try:
+            async with limiter.slot():
+                with stage("upstream_request"):
+                    response = await client.get(url, **kwargs)
+        except httpx.TransportError:
+            UPSTREAM_RESPONSES.inc(limiter.host, "error")
+            limiter.record(None)
+            if last_attempt:
+                raise
+        else:
+            UPSTREAM_RESPONSES.inc(limiter.host, response.status_code)
+            UPSTREAM_PAYLOAD_BYTES.observe(len(response.content), limiter.host)
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            limiter.record(response.status_code, retry_after)
+
+            if response.status_code not in THROTTLE_STATUSES or last_attempt:
+                return response
+
+        limiter.retries += 1
+        await asyncio.sleep(backoff_delay(attempt))
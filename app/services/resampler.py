@@ -0,0 +1,75 @@
+from datetime import date
+from functools import lru_cache
+from app.services.bar_store import chart_payload
+from app.services.holiday_checker import period_start
+from app.services.transformers import EPOCH_ORDINAL, SECONDS_PER_DAY, Bars, parse_yahoo_data
+
+@lru_cache(maxsize=65536)
+def period_start_timestamp(day: int, timeframe: str) -> int:
+    """
+    Obtiene el timestamp (00:00 UTC) del inicio de la semana o mes que contiene un día UNIX.
+    Yahoo Finance fecha las velas semanales en lunes y las mensuales en el día 1.
+    """
+    start = period_start(date.fromordinal(EPOCH_ORDINAL + day), timeframe)
+    return (start.toordinal() - EPOCH_ORDINAL) * SECONDS_PER_DAY
+
+def resample_bars(daily_bars: Bars, timeframe: str, period1: int = 0) -> list[tuple]:
+    """
+    Agrupa velas diarias en velas semanales ('1wk') o mensuales ('1mo').
+    Solo existen velas diarias en días hábiles, así que los feriados del calendario
+    bursátil quedan excluidos de la agregación igual que en Yahoo Finance.
+    :param daily_bars: Velas diarias (orden descendente, como las entrega parse_yahoo_data).
+    :param timeframe: '1wk' o '1mo'.
+    :param period1: Se incluyen los periodos cuyo inicio es igual o posterior al periodo de este timestamp.
+    :return: Lista de velas (timestamp, open, high, low, close, volume) en orden ascendente.
+    """
+    first_period = period_start_timestamp(period1 // SECONDS_PER_DAY, timeframe)
+    resampled = []
+    current = None
+
+    columns = (daily_bars.timestamps, daily_bars.open, daily_bars.high, daily_bars.low, daily_bars.close, daily_bars.volume)
+    for timestamp, open, high, low, close, volume in zip(*(reversed(column) for column in columns)):
+        period = period_start_timestamp(timestamp // SECONDS_PER_DAY, timeframe)
+
+        if period < first_period:
+            continue
+
+        if current is None or current[0] != period:
+            if current is not None:
+                resampled.append(tuple(current))
+            current = [period, open, high, low, close, volume]
+            continue
+
+        # Combinar la vela diaria con la vela del periodo (ignorando valores nulos)
+        if current[1] is None:
+            current[1] = open
+        if high is not None and (current[2] is None or high > current[2]):
+            current[2] = high
+        if low is not None and (current[3] is None or low < current[3]):
+            current[3] = low
+        if close is not None:
+            current[4] = close
+        if volume is not None:
+            current[5] = volume if current[5] is None else current[5] + volume
+
+    if current is not None:
+        resampled.append(tuple(current))
+
+    return resampled
+
+def resample_yahoo_data(daily_data: dict, timeframe: str, period1: int = 0) -> dict:
+    """
+    Construye datos transformados semanales o mensuales a partir de datos diarios.
+    Se aplica la misma regla de parse_yahoo_data para descartar el periodo en curso.
+    :param daily_data: Resultado de parse_yahoo_data para '1d'.
+    :param timeframe: '1wk' o '1mo'.
+    :param period1: Inicio del periodo solicitado en timestamp UNIX.
+    :return: Datos transformados con 'bulk' como instancia de Bars.
+    """
+    if daily_data.get("error") is not None or not daily_data.get("data"):
+        return daily_data
+
+    data = daily_data["data"]
+    bars = resample_bars(data["bulk"], timeframe, period1)
+
+    return parse_yahoo_data(chart_payload(data["symbol"], bars), timeframe)
@@ -0,0 +1,212 @@
+from array import array
+from datetime import date, time, timedelta
+from functools import lru_cache
+
+# Cierre anticipado de la bolsa (NYSE) en vísperas de feriados
+EARLY_CLOSE = time(13, 0)
+
+# Cierres extraordinarios que no siguen una regla (eventos y duelos nacionales)
+SPECIAL_CLOSURES = {
+    date(2001, 9, 11), date(2001, 9, 12), date(2001, 9, 13), date(2001, 9, 14),
+    date(2004, 6, 11),
+    date(2007, 1, 2),
+    date(2012, 10, 29), date(2012, 10, 30),
+    date(2018, 12, 5),
+    date(2025, 1, 9),
+}
+
+def easter_sunday(year: int) -> date:
+    """Calcula el domingo de Pascua (algoritmo gregoriano anónimo)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+def nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """
+    Obtiene el n-ésimo día de la semana de un mes (n=-1 para el último).
+    :param weekday: 0 = lunes ... 6 = domingo.
+    """
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+    last = (date(year, month, 28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def observed(day: date) -> date:
+    """Traslada un feriado de sábado al viernes y de domingo al lunes."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+@lru_cache(maxsize=None)
+def nyse_holidays(year: int) -> frozenset[date]:
+    """
+    Genera los feriados de la bolsa (NYSE) de un año a partir de sus reglas.
+    :param year: Año a calcular.
+    :return: Conjunto de fechas en que la bolsa está cerrada (sin contar fines de semana).
+    """
+    holidays = set()
+
+    # Año Nuevo: si cae en sábado no se traslada al viernes anterior
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(observed(new_year))
+
+    if year >= 1998:
+        holidays.add(nth_weekday(year, 1, 0, 3))  # Martin Luther King Jr.
+    holidays.add(nth_weekday(year, 2, 0, 3))  # Washington's Birthday
+    holidays.add(easter_sunday(year) - timedelta(days=2))  # Viernes Santo
+    holidays.add(nth_weekday(year, 5, 0, -1))  # Memorial Day
+    if year >= 2022:
+        holidays.add(observed(date(year, 6, 19)))  # Juneteenth
+    holidays.add(observed(date(year, 7, 4)))  # Independence Day
+    holidays.add(nth_weekday(year, 9, 0, 1))  # Labor Day
+    holidays.add(nth_weekday(year, 11, 3, 4))  # Thanksgiving
+    holidays.add(observed(date(year, 12, 25)))  # Navidad
+
+    holidays.update(day for day in SPECIAL_CLOSURES if day.year == year)
+
+    return frozenset(holidays)
+
+@lru_cache(maxsize=None)
+def nyse_early_closes(year: int) -> frozenset[date]:
+    """
+    Genera los días de cierre anticipado (13:00) de la bolsa de un año.
+    :param year: Año a calcular.
+    :return: Conjunto de fechas con cierre anticipado.
+    """
+    holidays = nyse_holidays(year)
+    candidates = [
+        date(year, 7, 3),  # Víspera de Independence Day
+        nth_weekday(year, 11, 3, 4) + timedelta(days=1),  # Día después de Thanksgiving
+        date(year, 12, 24),  # Nochebuena
+    ]
+
+    return frozenset(
+        day for day in candidates
+        if day.weekday() < 5 and day not in holidays
+    )
+
+class TradingCalendar:
+    """
+    Calendario de días hábiles de la bolsa con consultas en tiempo constante.
+    Para un rango de años se precalcula un mapa de bits de días hábiles, el
+    conteo acumulado de días hábiles por día y la lista ordenada de días
+    hábiles; el rango se amplía automáticamente al consultar fechas fuera de él.
+    """
+
+    def __init__(self, first_year: int = None, last_year: int = None):
+        today = date.today()
+        self._first_year = first_year or today.year - 30
+        self._last_year = last_year or today.year + 10
+        self._built = False
+
+    def _build(self) -> None:
+        self._base = date(self._first_year, 1, 1).toordinal()
+        days = date(self._last_year + 1, 1, 1).toordinal() - self._base
+
+        holidays = set()
+        for year in range(self._first_year, self._last_year + 1):
+            holidays.update(nyse_holidays(year))
+
+        # Mapa de bits de días hábiles, conteo acumulado y ordinales de días hábiles
+        self._is_business = bytearray(days)
+        self._cumulative = array("l", [0]) * (days + 1)
+        self._business_days = array("l")
+
+        count = 0
+        for offset in range(days):
+            ordinal = self._base + offset
+            day = date.fromordinal(ordinal)
+            if day.weekday() < 5 and day not in holidays:
+                self._is_business[offset] = 1
+                self._business_days.append(ordinal)
+                count += 1
+            self._cumulative[offset + 1] = count
+
+        self._built = True
+
+    def _ensure(self, *days: date) -> None:
+        """Construye el índice o lo amplía para cubrir las fechas indicadas."""
+        first_year = min(self._first_year, *(day.year - 1 for day in days))
+        last_year = max(self._last_year, *(day.year + 1 for day in days))
+
+        if not self._built or first_year < self._first_year or last_year > self._last_year:
+            if self._built:
+                self._first_year, self._last_year = first_year, last_year
+            self._build()
+
+    def _offset(self, day: date) -> int:
+        """Posición de la fecha en el índice."""
+        if self._built:
+            offset = day.toordinal() - self._base
+            if 0 <= offset < len(self._is_business):
+                return offset
+
+        self._ensure(day)
+        return day.toordinal() - self._base
+
+    def is_business_day(self, day: date) -> bool:
+        """Verifica si la bolsa abre en la fecha."""
+        offset = self._offset(day)
+        return bool(self._is_business[offset])
+
+    def is_holiday(self, day: date) -> bool:
+        """Verifica si la fecha es un feriado de la bolsa (día de semana sin operación)."""
+        return day.weekday() < 5 and not self.is_business_day(day)
+
+    def is_early_close(self, day: date) -> bool:
+        """Verifica si la bolsa cierra anticipadamente en la fecha."""
+        return day in nyse_early_closes(day.year)
+
+    def business_days_between(self, start: date, end: date) -> int:
+        """
+        Cuenta los días hábiles en [start, end).
+        """
+        self._ensure(start, end)
+        return self._cumulative[self._offset(end)] - self._cumulative[self._offset(start)]
+
+    def business_days_back(self, day: date, n: int) -> date:
+        """
+        Obtiene el n-ésimo día hábil anterior a la fecha (sin contarla).
+        """
+        offset = self._offset(day)
+        index = self._cumulative[offset] - n
+        if index < 0:
+            # Ampliar el índice hacia atrás lo suficiente para cubrir n días hábiles
+            self._ensure(day - timedelta(days=2 * n + 14))
+            return self.business_days_back(day, n)
+        return date.fromordinal(self._business_days[index])
+
+    def next_business_day(self, day: date) -> date:
+        """
+        Obtiene el primer día hábil igual o posterior a la fecha.
+        """
+        offset = self._offset(day)
+        index = self._cumulative[offset]
+        if index >= len(self._business_days):
+            self._ensure(day + timedelta(days=14))
+            return self.next_business_day(day)
+        return date.fromordinal(self._business_days[index])
+
+    def first_business_day_of_week(self, day: date) -> date:
+        """Obtiene el primer día hábil de la semana (lunes a domingo) de la fecha."""
+        return self.next_business_day(day - timedelta(days=day.weekday()))
+
+    def first_business_day_of_month(self, day: date) -> date:
+        """Obtiene el primer día hábil del mes de la fecha."""
+        return self.next_business_day(day.replace(day=1))
+
+# Calendario compartido (el índice se construye en la primera consulta)
+trading_calendar = TradingCalendar()
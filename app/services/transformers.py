@@ -1,12 +1,95 @@
-from datetime import datetime, timezone
+from bisect import bisect_left
+from datetime import date, datetime, timezone
+from functools import lru_cache
 from app.services.holiday_checker import is_first_business_day_of_week, is_first_business_day_of_month
+from app.utils.metrics import timed
 
-def transform_yahoo_data(raw_data: dict, timeframe: str) -> dict:
+SECONDS_PER_DAY = 86400
+
+# Ordinal del 1970-01-01 para convertir días UNIX a fechas sin pasar por datetime
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+class Bars:
     """
-    Transforma los datos de la API de Yahoo Finance al formato deseado.
+    Velas en formato columnar: listas paralelas de fechas y valores OHLCV,
+    ordenadas por fecha descendente. Las filas (dicts) y columnas para la
+    respuesta se construyen una sola vez y se reutilizan.
+    """
+    __slots__ = ("timestamps", "dates", "open", "high", "low", "close", "volume", "_rows", "_columns")
+
+    def __init__(self, timestamps: list, dates: list, open: list, high: list, low: list, close: list, volume: list):
+        self.timestamps = timestamps
+        self.dates = dates
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self._rows = None
+        self._columns = None
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def since(self, timestamp: int) -> "Bars":
+        """
+        Obtiene las velas con timestamp igual o posterior al indicado.
+        """
+        end = len(self.timestamps)
+        while end and self.timestamps[end - 1] < timestamp:
+            end -= 1
+
+        return Bars(
+            self.timestamps[:end],
+            self.dates[:end],
+            self.open[:end],
+            self.high[:end],
+            self.low[:end],
+            self.close[:end],
+            self.volume[:end],
+        )
+
+    def to_rows(self) -> list[dict]:
+        """Convierte las velas a la lista de dicts por fecha."""
+        if self._rows is None:
+            self._rows = [
+                {"date": day, "open": open, "high": high, "low": low, "close": close, "volume": volume}
+                for day, open, high, low, close, volume
+                in zip(self.dates, self.open, self.high, self.low, self.close, self.volume)
+            ]
+        return self._rows
+
+    def to_columns(self) -> dict:
+        """Convierte las velas a un dict de listas paralelas."""
+        if self._columns is None:
+            self._columns = {
+                "date": self.dates,
+                "open": self.open,
+                "high": self.high,
+                "low": self.low,
+                "close": self.close,
+                "volume": self.volume,
+            }
+        return self._columns
+
+@lru_cache(maxsize=65536)
+def day_to_date(day: int) -> str:
+    """Convierte un número de día UNIX a fecha 'YYYY-MM-DD'."""
+    return date.fromordinal(EPOCH_ORDINAL + day).isoformat()
+
+def timestamps_to_dates(timestamps: list[int]) -> list[str]:
+    """
+    Convierte en lote timestamps UNIX (UTC) a fechas 'YYYY-MM-DD'.
+    """
+    return [day_to_date(timestamp // SECONDS_PER_DAY) for timestamp in timestamps]
+
+@timed("transform_yahoo_data")
+def parse_yahoo_data(raw_data: dict, timeframe: str) -> dict:
+    """
+    Transforma los datos de la API de Yahoo Finance a velas columnares.
     :param raw_data: Diccionario crudo recibido de Yahoo Finance.
     :param timeframe: Granularidad de los datos (por ejemplo, '1mo', '1wk').
-    :return: Datos transformados en el formato esperado.
+    :return: Datos transformados con 'bulk' como instancia de Bars.
     """
     try:
         # Extraer la parte relevante del raw_data
@@ -24,29 +107,29 @@ def transform_yahoo_data(raw_data: dict, timeframe: str) -> dict:
         date_start = datetime.fromtimestamp(timestamps[0], timezone.utc).strftime("%Y-%m-%d")
         date_end = datetime.fromtimestamp(timestamps[-1], timezone.utc).strftime("%Y-%m-%d")
 
-        # Generar lista de datos bulk
-        bulk_data = []
-        for idx, timestamp in enumerate(timestamps):
-            bulk_data.append({
-                "date": datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d"),
-                "open": indicators["open"][idx],
-                "high": indicators["high"][idx],
-                "low": indicators["low"][idx],
-                "close": indicators["close"][idx],
-                "volume": indicators["volume"][idx]
-            })
-        
-        # Filtrar registros futuros
-        bulk_data = filter_future_dates(bulk_data)
-        
-        # Ordenar bulk_data por fecha descendente
-        bulk_data = sorted(bulk_data, key=lambda x: x["date"], reverse=True)
-        
-        # Verificar y eliminar el primer registro si corresponde
+        # Yahoo devuelve las velas en orden ascendente: se corta en el primer registro
+        # futuro y se invierte el resto en una sola pasada (sin filtrar ni ordenar)
+        cut = bisect_left(timestamps, first_future_timestamp())
+
+        # Eliminar el registro más reciente si corresponde
         if timeframe == "1wk" and not is_first_business_day_of_week():
-            bulk_data.pop(0)
+            cut -= 1
         elif timeframe == "1mo" and not is_first_business_day_of_month():
-            bulk_data.pop(0)
+            cut -= 1
+
+        def newest_first(column: list) -> list:
+            return column[cut - 1::-1] if cut > 0 else []
+
+        recent_timestamps = newest_first(timestamps)
+        bars = Bars(
+            recent_timestamps,
+            timestamps_to_dates(recent_timestamps),
+            newest_first(indicators["open"]),
+            newest_first(indicators["high"]),
+            newest_first(indicators["low"]),
+            newest_first(indicators["close"]),
+            newest_first(indicators["volume"]),
+        )
 
         # Transformar al formato esperado
         transformed_data = {
@@ -55,7 +138,7 @@ def transform_yahoo_data(raw_data: dict, timeframe: str) -> dict:
                 "timeFrame": timeframe,
                 "dateStart": date_start,
                 "dateEnd": date_end,
-                "bulk": bulk_data
+                "bulk": bars
             },
             "error": None
         }
@@ -69,6 +152,42 @@ def transform_yahoo_data(raw_data: dict, timeframe: str) -> dict:
             "error": str(e)
         }
 
+@timed("render_bulk")
+def render_bulk(transformed_data: dict, columnar: bool = False) -> dict:
+    """
+    Convierte el 'bulk' columnar de unos datos transformados al formato de respuesta.
+    :param transformed_data: Resultado de parse_yahoo_data.
+    :param columnar: True para devolver listas paralelas, False para una lista de dicts por fecha.
+    :return: Datos transformados con 'bulk' serializable.
+    """
+    data = transformed_data.get("data")
+
+    if not data or not isinstance(data.get("bulk"), Bars):
+        return transformed_data
+
+    bars = data["bulk"]
+    return {
+        **transformed_data,
+        "data": {**data, "bulk": bars.to_columns() if columnar else bars.to_rows()},
+    }
+
+def transform_yahoo_data(raw_data: dict, timeframe: str, columnar: bool = False) -> dict:
+    """
+    Transforma los datos de la API de Yahoo Finance al formato deseado.
+    :param raw_data: Diccionario crudo recibido de Yahoo Finance.
+    :param timeframe: Granularidad de los datos (por ejemplo, '1mo', '1wk').
+    :param columnar: True para devolver 'bulk' como listas paralelas.
+    :return: Datos transformados en el formato esperado.
+    """
+    return render_bulk(parse_yahoo_data(raw_data, timeframe), columnar)
+
+def first_future_timestamp() -> int:
+    """
+    Obtiene el timestamp del inicio del día siguiente (UTC); las velas desde ahí son futuras.
+    """
+    now = int(datetime.now(timezone.utc).timestamp())
+    return now - now % SECONDS_PER_DAY + SECONDS_PER_DAY
+
 def filter_future_dates(bulk_data: list) -> list:
     """
     Filtra registros con fechas posteriores al día actual.
@@ -80,5 +199,5 @@ def filter_future_dates(bulk_data: list) -> list:
 
     # Filtrar registros cuya fecha sea igual o anterior a la fecha actual
     filtered_data = [record for record in bulk_data if record["date"] <= today]
-    
+
     return filtered_data
@@ -0,0 +1,188 @@
+import asyncio
+import math
+from array import array
+from collections import deque
+from datetime import datetime
+from app.core.config import settings
+from app.services.market_data import fetch_market_bars, normalize_window
+from app.services.trading_calendar import trading_calendar
+from app.services.transformers import Bars
+from app.utils.metrics import timed
+
+class VolumeMatrix:
+    """
+    Volúmenes de un universo de símbolos en una matriz contigua (array de doubles),
+    una fila por símbolo y columnas en orden cronológico ascendente. Todas las
+    filas tienen el mismo ancho: la ventana de referencia más los días evaluados.
+    """
+    __slots__ = ("symbols", "dates", "width", "values")
+
+    def __init__(self, width: int):
+        self.symbols: list[str] = []
+        self.dates: list[list[str]] = []
+        self.width = width
+        self.values = array("d")
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def add(self, symbol: str, bars: Bars) -> bool:
+        """
+        Agrega las últimas velas con volumen de un símbolo como una nueva fila.
+        :return: False si no hay suficientes velas para completar la fila.
+        """
+        rows = [(day, volume) for day, volume in zip(bars.dates, bars.volume) if volume is not None]
+        if len(rows) < self.width:
+            return False
+
+        # Las velas vienen de la más reciente a la más antigua
+        rows = rows[self.width - 1::-1]
+        self.symbols.append(symbol)
+        self.dates.append([day for day, _ in rows])
+        self.values.extend(float(volume) for _, volume in rows)
+        return True
+
+@timed("volume_scan")
+def scan_volume_matrix(matrix: VolumeMatrix, window: int, zscore_threshold: float, relative_volume_threshold: float) -> list[dict]:
+    """
+    Evalúa en una sola pasada cada día posterior a la ventana inicial de todas las filas,
+    comparándolo con los 'window' días anteriores: mínimo y máximo móviles (colas
+    monótonas), media y desviación (sumas móviles), z-score y volumen relativo.
+    :param matrix: Matriz de volúmenes del universo.
+    :param window: Días de referencia previos a cada día evaluado.
+    :param zscore_threshold: |z-score| a partir del cual el volumen se considera inusual.
+    :param relative_volume_threshold: Volumen relativo (volumen / media) a partir del cual se considera inusual.
+    :return: Resultados por símbolo con las señales de cada día evaluado (el más reciente primero).
+    """
+    values = matrix.values
+    width = matrix.width
+    results = []
+
+    for row, symbol in enumerate(matrix.symbols):
+        offset = row * width
+        dates = matrix.dates[row]
+        lows, highs = deque(), deque()
+        total = squares = 0.0
+        signals = []
+
+        for column in range(width):
+            volume = values[offset + column]
+
+            if column >= window:
+                mean = total / window
+                variance = max(0.0, squares / window - mean * mean)
+                deviation = math.sqrt(variance)
+                window_min = values[offset + lows[0]]
+                window_max = values[offset + highs[0]]
+                zscore = (volume - mean) / deviation if deviation else 0.0
+                relative_volume = volume / mean if mean else 0.0
+                is_high = volume > window_max
+                is_low = volume < window_min
+
+                signals.append({
+                    "date": dates[column],
+                    "volume": volume,
+                    "relative_volume": round(relative_volume, 4),
+                    "zscore": round(zscore, 4),
+                    "window_min": window_min,
+                    "window_max": window_max,
+                    "is_high": is_high,
+                    "is_low": is_low,
+                    "unusual": (
+                        is_high or is_low or abs(zscore) >= zscore_threshold
+                        or relative_volume >= relative_volume_threshold
+                    ),
+                })
+
+                # Retirar de la ventana el día que queda fuera
+                leaving = values[offset + column - window]
+                total -= leaving
+                squares -= leaving * leaving
+                if lows[0] == column - window:
+                    lows.popleft()
+                if highs[0] == column - window:
+                    highs.popleft()
+
+            total += volume
+            squares += volume * volume
+            while lows and values[offset + lows[-1]] >= volume:
+                lows.pop()
+            lows.append(column)
+            while highs and values[offset + highs[-1]] <= volume:
+                highs.pop()
+            highs.append(column)
+
+        signals.reverse()
+        results.append({
+            "symbol": symbol,
+            "score": max(abs(signal["zscore"]) for signal in signals),
+            "unusual": any(signal["unusual"] for signal in signals),
+            **{key: signals[0][key] for key in ("date", "volume", "relative_volume", "zscore")},
+            "signals": signals,
+        })
+
+    return results
+
+def rank_scan_results(results: list[dict], sort_by: str = "score", only_unusual: bool = False, limit: int = None) -> list[dict]:
+    """
+    Ordena los resultados de mayor a menor según el criterio indicado.
+    :param sort_by: 'score' (mayor |z-score| de los días evaluados), 'zscore' o 'relative_volume' del último día.
+    :param only_unusual: True para devolver solo los símbolos con alguna señal inusual.
+    :param limit: Cantidad máxima de resultados.
+    """
+    if only_unusual:
+        results = [result for result in results if result["unusual"]]
+
+    ranked = sorted(results, key=lambda result: result[sort_by], reverse=True)
+    return ranked[:limit] if limit else ranked
+
+async def scan_unusual_volume_service(
+    symbols: list[str],
+    window: int = None,
+    lookback: int = None,
+    zscore_threshold: float = None,
+    relative_volume_threshold: float = None,
+    sort_by: str = "score",
+    only_unusual: bool = False,
+    limit: int = None,
+) -> dict:
+    """
+    Escanea el volumen de un universo de símbolos usando las velas diarias en caché.
+    :param symbols: Símbolos a escanear.
+    :param window: Días de referencia; por defecto settings.scan_window.
+    :param lookback: Días más recientes a evaluar; por defecto settings.scan_lookback.
+    :return: Resultados ordenados y símbolos omitidos por falta de datos o errores.
+    """
+    window = window or settings.scan_window
+    lookback = lookback or settings.scan_lookback
+    zscore_threshold = settings.scan_zscore_threshold if zscore_threshold is None else zscore_threshold
+    relative_volume_threshold = settings.scan_relative_volume_threshold if relative_volume_threshold is None else relative_volume_threshold
+
+    # Misma ventana para todos los símbolos para que compartan entradas de caché; se piden días de holgura por velas sin volumen
+    now = datetime.now()
+    start = datetime.combine(trading_calendar.business_days_back(now.date(), window + lookback + 2), now.time())
+    period1, period2 = normalize_window(int(start.timestamp()), int(now.timestamp()))
+
+    fetched = await asyncio.gather(
+        *(fetch_market_bars(symbol, "1d", period1, period2) for symbol in symbols),
+        return_exceptions=True,
+    )
+
+    matrix = VolumeMatrix(window + lookback)
+    skipped = []
+
+    for symbol, result in zip(symbols, fetched):
+        if isinstance(result, Exception) or result.get("error") or not result.get("data"):
+            skipped.append({"symbol": symbol, "reason": "upstream_error"})
+        elif not matrix.add(symbol, result["data"]["bulk"]):
+            skipped.append({"symbol": symbol, "reason": "insufficient_data"})
+
+    results = scan_volume_matrix(matrix, window, zscore_threshold, relative_volume_threshold)
+
+    return {
+        "window": window,
+        "lookback": lookback,
+        "scanned": len(matrix),
+        "results": rank_scan_results(results, sort_by, only_unusual, limit),
+        "skipped": skipped,
+    }
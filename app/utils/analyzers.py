@@ -1,3 +1,8 @@
+from datetime import datetime, timezone
+from statistics import median
+from app.utils.metrics import timed
+
+@timed("determine_unusual_volume")
 def determine_unusual_volume(day_data: dict) -> bool:
     """
     Determina si el volumen reciente o del día anterior es inusual (muy alto o muy bajo)
@@ -51,63 +56,58 @@ def is_unusual_in_range(volume: int, bulk_data: list[dict], start: int, end: int
     else:
         raise ValueError("El parámetro 'check' debe ser 'low' o 'high'")
 
-import httpx
-from datetime import datetime
-
-import httpx
-from datetime import datetime
-
-async def determine_seasonality(symbol: str) -> str:
+@timed("seasonality_statistics")
+def seasonality_statistics(monthly_bars) -> dict[int, dict]:
     """
-    Determina la estacionalidad para el mes actual de un símbolo basado en datos de una API externa.
-    :param symbol: Símbolo para el cual calcular la estacionalidad.
-    :return: "up", "down" o "neutral" según la tendencia promedio del cambio.
+    Calcula la estacionalidad por mes calendario a partir de velas mensuales: el retorno
+    de cada mes es su cierre respecto del cierre del mes anterior (solo meses consecutivos).
+    :param monthly_bars: Velas mensuales columnares (Bars), de la más reciente a la más antigua.
+    :return: Por mes (1-12), muestras, retorno promedio y mediano y proporción de meses al alza.
     """
-    url = f"https://phx.unusualwhales.com/api/seasonality/{symbol}/year-month"
-
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36",
-        "Accept": "application/json",
-        "Accept-Encoding": "gzip, deflate, br",
-        "Connection": "keep-alive"
-    }
-
-    try:
-        # Hacer la solicitud HTTP con encabezados
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-
-        # Verificar si la solicitud fue exitosa
-        response.raise_for_status()
+    returns = {month: [] for month in range(1, 13)}
+    previous_index, previous_close = None, None
 
-        # Decodificar la respuesta JSON y extraer los datos
-        json_response = response.json()
-        data = json_response.get("data", [])
+    for index in range(len(monthly_bars.timestamps) - 1, -1, -1):
+        close = monthly_bars.close[index]
+        if close is None or close <= 0:
+            previous_index, previous_close = None, None
+            continue
 
-        # Verificar si hay datos
-        if not isinstance(data, list) or not data:
-            return "unknow"
+        day = datetime.fromtimestamp(monthly_bars.timestamps[index], timezone.utc)
+        month_index = day.year * 12 + day.month - 1
 
-        # Obtener el mes actual
-        current_month = datetime.now().month
+        if previous_close is not None and month_index - previous_index == 1:
+            returns[day.month].append(close / previous_close - 1)
+        previous_index, previous_close = month_index, close
 
-        # Filtrar los datos para el mes actual
-        filtered_data = [
-            item for item in data
-            if isinstance(item, dict) and item.get("month") == current_month
-        ]
+    return {month: summarize_returns(values) for month, values in returns.items()}
 
-        if not filtered_data:
-            return "unknow"
-
-        # Calcular el promedio del cambio
-        average_change = sum(float(item.get("change", 0)) for item in filtered_data) / len(filtered_data)
+def summarize_returns(values: list[float]) -> dict:
+    """
+    Resume los retornos de un mes calendario.
+    :return: Diccionario con muestras, retorno promedio, retorno mediano y proporción al alza (None sin muestras).
+    """
+    if not values:
+        return {"samples": 0, "average_return": None, "median_return": None, "hit_rate": None}
+
+    return {
+        "samples": len(values),
+        "average_return": round(sum(values) / len(values), 6),
+        "median_return": round(median(values), 6),
+        "hit_rate": round(sum(value > 0 for value in values) / len(values), 4),
+    }
 
-        # Determinar tendencia como string
-        return "up" if average_change > 0 else "down" if average_change < 0 else "unknow"
+def determine_seasonality(statistics: dict[int, dict], month: int, min_samples: int = 1) -> str:
+    """
+    Determina la estacionalidad de un mes según el retorno promedio histórico.
+    :param statistics: Resultado de seasonality_statistics.
+    :param month: Mes calendario (1-12).
+    :param min_samples: Años de historia mínimos para dar una tendencia.
+    :return: "up" o "down" según el signo del retorno promedio, o "unknow" sin historia suficiente.
+    """
+    stats = statistics.get(month) or {}
 
-    except httpx.HTTPError:
+    if stats.get("samples", 0) < min_samples or not stats.get("average_return"):
         return "unknow"
 
-    except Exception:
-        return "unknow"
+    return "up" if stats["average_return"] > 0 else "down"
@@ -0,0 +1,93 @@
+import gzip
+import json
+from typing import Optional
+from fastapi import Request
+from fastapi.responses import Response
+from app.core.config import settings
+
+# Serializador y compresor rápidos opcionales: se usan si están instalados
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+def dumps(content) -> bytes:
+    """
+    Serializa a JSON (UTF-8) con orjson si está disponible o con json de la biblioteca estándar.
+    Solo admite tipos nativos (dict, list, str, int, float, bool, None), que es lo que producen los servicios.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def supported_encodings() -> tuple[str, ...]:
+    """Codificaciones de compresión disponibles en orden de preferencia."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Elige la codificación de compresión según el encabezado Accept-Encoding (respetando los valores q).
+    :return: 'br', 'gzip' o None si el cliente no acepta ninguna disponible.
+    """
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    candidates = [(accepted.get(name, wildcard), name) for name in supported_encodings()]
+    quality, name = max(candidates, key=lambda candidate: candidate[0])
+    return name if quality > 0 else None
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """
+    ETag de la representación para la codificación negociada. El sufijo depende solo de la
+    negociación (no del tamaño del cuerpo), para que una respuesta 304 lleve el mismo ETag
+    que el 200 sin tener que construir el cuerpo.
+    """
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Comprime el cuerpo con la codificación indicada ('br' o 'gzip').
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.brotli_quality)
+    return gzip.compress(body, compresslevel=settings.gzip_level, mtime=0)
+
+def encoded_response(request: Request, content, status_code: int = 200, headers: dict = None) -> Response:
+    """
+    Construye una respuesta JSON sin pasar por jsonable_encoder y la comprime si el
+    cliente lo acepta y el cuerpo supera settings.compression_min_size.
+    :param request: Solicitud, para leer Accept-Encoding.
+    :param content: Contenido ya formado con tipos nativos (ej. success_response).
+    """
+    body = dumps(content)
+    headers = dict(headers or {})
+    headers["Vary"] = f'{headers["Vary"]}, Accept-Encoding' if "Vary" in headers else "Accept-Encoding"
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+
+    # Cada codificación negociada lleva su propio ETag fuerte
+    if "ETag" in headers:
+        headers["ETag"] = encoded_etag(headers["ETag"], encoding)
+
+    if encoding and len(body) >= settings.compression_min_size:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+
+    return Response(body, status_code=status_code, headers=headers, media_type="application/json")
@@ -0,0 +1,93 @@
+import hashlib
+from datetime import datetime
+from fastapi import Request
+from fastapi.responses import Response
+from app.core.config import settings
+from app.services.bar_store import completed_boundary
+from app.services.holiday_checker import is_market_open, seconds_until_market_open
+from app.services.market_data import cache_ttl
+from app.utils.encoding import encoded_etag, negotiate_encoding
+
+# Sufijos que encoded_response agrega al ETag según la codificación negociada
+ENCODING_SUFFIXES = ("-br", "-gzip")
+
+# Granularidades cuyo contenido para un rango histórico no depende del día de la consulta
+# (en '1wk' y '1mo' parse_yahoo_data descarta la última vela según la fecha actual)
+IMMUTABLE_TIMEFRAMES = ("1d",)
+
+def bulk_signature(bulk) -> tuple:
+    """
+    Resume las velas renderizadas (filas o columnas, de la más reciente a la más antigua)
+    en la cantidad, la fecha más antigua y todos los valores de la vela más reciente,
+    que es la única que puede cambiar entre consultas.
+    """
+    if isinstance(bulk, dict):
+        dates = bulk.get("date") or []
+        if not dates:
+            return (0,)
+        return (len(dates), dates[-1], *(column[0] for column in bulk.values()))
+
+    if not bulk:
+        return (0,)
+    return (len(bulk), bulk[-1]["date"], *bulk[0].values())
+
+def make_etag(*parts) -> str:
+    """
+    Construye un ETag fuerte a partir de las partes que determinan el contenido de la respuesta.
+    """
+    return '"' + hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest() + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Verifica si el encabezado If-None-Match de la solicitud incluye el ETag
+    (comparación débil, ignorando el sufijo de la codificación de compresión).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    for candidate in header.split(","):
+        candidate = candidate.strip().removeprefix("W/")
+        for suffix in ENCODING_SUFFIXES:
+            if candidate.endswith(suffix + '"'):
+                candidate = candidate[:-len(suffix) - 1] + '"'
+                break
+        if candidate == etag:
+            return True
+
+    return False
+
+def cache_control(timeframes: tuple[str, ...], period2: int = None, now: datetime = None) -> str:
+    """
+    Calcula el encabezado Cache-Control según la granularidad y el horario de mercado.
+    Un rango diario que termina antes del día en curso ya no cambia; con el mercado cerrado
+    el edge puede conservar la respuesta hasta la próxima apertura.
+    :param timeframes: Granularidades incluidas en la respuesta.
+    :param period2: Fin del rango pedido (timestamp UNIX), si se indicó.
+    """
+    if period2 is not None and all(
+        timeframe in IMMUTABLE_TIMEFRAMES and period2 <= completed_boundary(timeframe, now)
+        for timeframe in timeframes
+    ):
+        max_age = settings.http_cache_immutable_max_age
+        return f"public, max-age={max_age}, s-maxage={max_age}, immutable"
+
+    max_age = int(min(cache_ttl(timeframe) for timeframe in timeframes))
+    s_maxage = max_age
+    if not is_market_open(now):
+        s_maxage = max(max_age, min(int(seconds_until_market_open(now)), settings.http_cache_closed_max_age))
+
+    return f"public, max-age={max_age}, s-maxage={s_maxage}, stale-while-revalidate={max_age}"
+
+def not_modified(request: Request, etag: str, cache_control_value: str, vary: str = None) -> Response:
+    """
+    Respuesta 304 sin cuerpo para una solicitud condicional cuyo ETag no cambió. Lleva el
+    mismo ETag (con el sufijo de la codificación negociada) que tendría la respuesta 200.
+    :param request: Solicitud, para leer Accept-Encoding.
+    :param vary: Encabezados adicionales de los que depende la respuesta (además de Accept-Encoding).
+    """
+    etag = encoded_etag(etag, negotiate_encoding(request.headers.get("accept-encoding")))
+    vary = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control_value, "Vary": vary})
@@ -0,0 +1,358 @@
+import math
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+from app.core.config import settings
+
+# Indicadores disponibles y si requieren periodo
+INDICATORS = {"sma": True, "ema": True, "rsi": True, "atr": True, "vwap": False}
+
+# Límites para los parámetros recibidos en la API
+MAX_INDICATORS = 10
+MAX_PERIOD = 500
+
+# Constantes de tiempo de historia previa para los indicadores con suavizado exponencial
+# (EMA con alfa 2/(n+1); RSI y ATR con el suavizado de Wilder, alfa 1/n): el peso de los
+# valores anteriores a la historia queda por debajo de e^-10
+WARMUP_FACTOR = 10
+
+# Segundos aproximados por vela (días hábiles en '1d') y margen para feriados
+SECONDS_PER_BAR = {"1d": 86400 * 7 / 5, "1wk": 86400 * 7, "1mo": 86400 * 31}
+WARMUP_MARGIN = 86400 * 14
+
+class IndicatorSpec(NamedTuple):
+    """Indicador pedido: nombre y periodo (None para VWAP acumulado)."""
+    name: str
+    period: Optional[int]
+
+    @property
+    def label(self) -> str:
+        return f"{self.name}:{self.period}" if self.period else self.name
+
+def parse_indicators(value: Optional[str]) -> list[IndicatorSpec]:
+    """
+    Interpreta el parámetro 'indicators' (ej. 'sma:20,ema:12,rsi:14,atr:14,vwap').
+    :return: Lista de indicadores sin repetir, en el orden pedido.
+    :raises ValueError: Si algún indicador o periodo no es válido.
+    """
+    specs = []
+    for item in (value or "").split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+
+        name, _, period = item.partition(":")
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator '{name}'; available: {', '.join(INDICATORS)}")
+
+        if not period:
+            if INDICATORS[name]:
+                raise ValueError(f"Indicator '{name}' requires a period, e.g. '{name}:14'")
+            spec = IndicatorSpec(name, None)
+        else:
+            if not period.isdigit() or not 1 <= int(period) <= MAX_PERIOD:
+                raise ValueError(f"Period of '{name}' must be an integer between 1 and {MAX_PERIOD}")
+            spec = IndicatorSpec(name, int(period))
+
+        if spec not in specs:
+            specs.append(spec)
+
+    if len(specs) > MAX_INDICATORS:
+        raise ValueError(f"At most {MAX_INDICATORS} indicators are allowed")
+    return specs
+
+def warmup_bars(spec: IndicatorSpec) -> int:
+    """
+    Velas previas necesarias para que el primer valor mostrado no dependa del inicio de la serie.
+    """
+    if spec.name == "vwap":
+        return 0
+    if spec.name == "sma":
+        return spec.period
+    if spec.name == "ema":
+        return WARMUP_FACTOR * (spec.period + 1) // 2 + spec.period
+    return WARMUP_FACTOR * spec.period + spec.period + 1
+
+def history_start(timeframe: str, first_timestamp: int, specs: list[IndicatorSpec]) -> int:
+    """
+    Calcula el inicio de la historia con la que se calculan los indicadores: retrocede las velas
+    de calentamiento desde la primera vela mostrada y se alinea al 1 de enero (UTC), para que
+    ventanas distintas del mismo año compartan la misma serie (y el mismo estado incremental).
+    El VWAP queda acumulado desde ese inicio.
+    :param first_timestamp: Timestamp de la vela más antigua a mostrar.
+    :return: Timestamp del inicio de la historia.
+    """
+    bars = max(warmup_bars(spec) for spec in specs)
+    start = first_timestamp - int(bars * SECONDS_PER_BAR[timeframe]) - WARMUP_MARGIN
+    year = datetime.fromtimestamp(start, timezone.utc).year
+    return int(datetime(year, 1, 1, tzinfo=timezone.utc).timestamp())
+
+def align_values(history, values: list[Optional[float]], bars) -> list[Optional[float]]:
+    """
+    Toma de los valores calculados sobre la historia los que corresponden a las velas mostradas.
+    :param history: Velas (Bars) con las que se calcularon los valores.
+    :param values: Valores alineados con 'history'.
+    :param bars: Velas (Bars) mostradas.
+    :return: Valores alineados con 'bars'; None para las velas que no están en la historia.
+    """
+    index = {timestamp: position for position, timestamp in enumerate(history.timestamps)}
+    return [values[index[timestamp]] if timestamp in index else None for timestamp in bars.timestamps]
+
+class RunningSum:
+    """Suma con compensación de Kahan, para que la suma móvil no acumule error de redondeo."""
+    __slots__ = ("total", "_compensation")
+
+    def __init__(self):
+        self.total = 0.0
+        self._compensation = 0.0
+
+    def add(self, value: float) -> None:
+        adjusted = value - self._compensation
+        total = self.total + adjusted
+        self._compensation = (total - self.total) - adjusted
+        self.total = total
+
+class SMA:
+    """Media móvil simple."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque()
+        self.sum = RunningSum()
+
+    def peek(self, high: float, low: float, close: float, volume: float) -> Optional[float]:
+        if len(self.window) + 1 < self.period:
+            return None
+        leaving = self.window[0] if len(self.window) == self.period else 0.0
+        return (self.sum.total - leaving + close) / self.period
+
+    def update(self, high: float, low: float, close: float, volume: float) -> Optional[float]:
+        value = self.peek(high, low, close, volume)
+        self.window.append(close)
+        self.sum.add(close)
+        if len(self.window) > self.period:
+            self.sum.add(-self.window.popleft())
+        return value
+
+class EMA:
+    """Media móvil exponencial, sembrada con la media simple de los primeros 'period' cierres."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.count = 0
+        self.seed = 0.0
+        self.value: Optional[float] = None
+
+    def peek(self, high: float, low: float, close: float, volume: float) -> Optional[float]:
+        if self.value is not None:
+            return self.value + self.alpha * (close - self.value)
+        if self.count + 1 == self.period:
+            return (self.seed + close) / self.period
+        return None
+
+    def update(self, high: float, low: float, close: float, volume: float) -> Optional[float]:
+        value = self.peek(high, low, close, volume)
+        self.count += 1
+        if self.value is None:
+            self.seed += close
+        self.value = value
+        return value
+
+class RSI:
+    """Índice de fuerza relativa con el suavizado de Wilder."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.previous: Optional[float] = None
+        self.changes = 0
+        self.gain = 0.0
+        self.loss = 0.0
+
+    def _averages(self, close: float) -> tuple[int, float, float]:
+        change = close - self.previous
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        changes = self.changes + 1
+
+        if changes <= self.period:
+            # Durante la siembra se acumulan sumas; al completar el periodo se convierten en promedios
+            average_gain, average_loss = self.gain + gain, self.loss + loss
+            if changes == self.period:
+                average_gain, average_loss = average_gain / self.period, average_loss / self.period
+        else:
+            average_gain = (self.gain * (self.period - 1) + gain) / self.period
+            average_loss = (self.loss * (self.period - 1) + loss) / self.period
+
+        return changes, average_gain, average_loss
+
+    def _value(self, changes: int, average_gain: float, average_loss: float) -> Optional[float]:
+        if changes < self.period:
+            return None
+        if average_loss == 0:
+            return 100.0
+        return 100 - 100 / (1 + average_gain / average_loss)
+
+    def peek(self, high: float, low: float, close: float, volume: float) -> Optional[float]:
+        if self.previous is None:
+            return None
+        return self._value(*self._averages(close))
+
+    def update(self, high: float, low: float, close: float, volume: float) -> Optional[float]:
+        if self.previous is None:
+            self.previous = close
+            return None
+
+        self.changes, self.gain, self.loss = self._averages(close)
+        self.previous = close
+        return self._value(self.changes, self.gain, self.loss)
+
+class ATR:
+    """Rango verdadero promedio con el suavizado de Wilder."""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.previous_close: Optional[float] = None
+        self.count = 0
+        self.average = 0.0
+
+    def _next(self, high: float, low: float) -> tuple[int, float]:
+        true_range = high - low
+        if self.previous_close is not None:
+            true_range = max(true_range, abs(high - self.previous_close), abs(low - self.previous_close))
+
+        count = self.count + 1
+        if count < self.period:
+            return count, self.average + true_range
+        if count == self.period:
+            return count, (self.average + true_range) / self.period
+        return count, (self.average * (self.period - 1) + true_range) / self.period
+
+    def peek(self, high: float, low: float, close: float, volume: float) -> Optional[float]:
+        count, average = self._next(high, low)
+        return average if count >= self.period else None
+
+    def update(self, high: float, low: float, close: float, volume: float) -> Optional[float]:
+        self.count, self.average = self._next(high, low)
+        self.previous_close = close
+        return self.average if self.count >= self.period else None
+
+class VWAP:
+    """Precio promedio ponderado por volumen (precio típico), acumulado desde la primera vela de la serie."""
+
+    def __init__(self, period: Optional[int] = None):
+        self.weighted = RunningSum()
+        self.volume = RunningSum()
+
+    def peek(self, high: float, low: float, close: float, volume: float) -> Optional[float]:
+        total_volume = self.volume.total + volume
+        if total_volume <= 0:
+            return None
+        return (self.weighted.total + (high + low + close) / 3 * volume) / total_volume
+
+    def update(self, high: float, low: float, close: float, volume: float) -> Optional[float]:
+        value = self.peek(high, low, close, volume)
+        self.weighted.add((high + low + close) / 3 * volume)
+        self.volume.add(volume)
+        return value
+
+CALCULATORS = {"sma": SMA, "ema": EMA, "rsi": RSI, "atr": ATR, "vwap": VWAP}
+
+def valid_bar(high, low, close, volume) -> bool:
+    """Las velas con algún valor nulo (o NaN) no actualizan los indicadores y devuelven None."""
+    return all(value is not None and not (isinstance(value, float) and math.isnan(value)) for value in (high, low, close, volume))
+
+class SeriesState:
+    """Estado incremental de un indicador sobre una serie: valores de las velas completas ya procesadas."""
+    __slots__ = ("calculator", "timestamps", "values")
+
+    def __init__(self, spec: IndicatorSpec):
+        self.calculator = CALCULATORS[spec.name](spec.period)
+        self.timestamps: list[int] = []
+        self.values: list[Optional[float]] = []
+
+class IndicatorEngine:
+    """
+    Calcula indicadores sobre series de velas guardando el estado por
+    (símbolo, granularidad, indicador, inicio de la serie). Las velas completas
+    se procesan una sola vez: cada vela nueva actualiza el estado en O(1) y la
+    vela en curso se evalúa sin modificarlo, por lo que puede cambiar entre consultas.
+    Sin límite explícito de estados se usa el de la configuración.
+    """
+
+    def __init__(self, max_states: Optional[int] = None):
+        self._max_states = max_states
+        self._states: OrderedDict[tuple, SeriesState] = OrderedDict()
+
+        # Contadores
+        self.bars_processed = 0
+        self.states_created = 0
+
+    @property
+    def max_states(self) -> int:
+        return settings.indicator_max_states if self._max_states is None else self._max_states
+
+    def compute(self, symbol: str, timeframe: str, bars, spec: IndicatorSpec, complete_before: int) -> list[Optional[float]]:
+        """
+        Calcula un indicador para todas las velas de la serie.
+        :param bars: Velas columnares (Bars), de la más reciente a la más antigua.
+        :param complete_before: Timestamp desde el cual las velas pueden cambiar (no se guardan en el estado).
+        :return: Valores alineados con las velas (de la más reciente a la más antigua); None donde no hay suficiente historia.
+        """
+        count = len(bars.timestamps)
+        if not count:
+            return []
+
+        key = (symbol, timeframe, spec, bars.timestamps[-1])
+        state = self._states.get(key)
+        processed = len(state.timestamps) if state else 0
+
+        # Una serie más corta con el mismo inicio ya está calculada en el estado
+        if processed >= count and bars.timestamps[0] == state.timestamps[count - 1]:
+            self._states.move_to_end(key)
+            return state.values[count - 1::-1]
+
+        # El estado solo sirve si la serie contiene las mismas velas completas ya procesadas
+        if state is None or processed > count or (processed and bars.timestamps[count - processed] != state.timestamps[-1]):
+            state = self._states[key] = SeriesState(spec)
+            processed = 0
+            self.states_created += 1
+
+        self._states.move_to_end(key)
+        while len(self._states) > self.max_states:
+            self._states.popitem(last=False)
+
+        calculator = state.calculator
+        pending = []
+
+        # Recorrer desde la vela más antigua aún no procesada hacia la más reciente
+        for index in range(count - processed - 1, -1, -1):
+            bar = (bars.high[index], bars.low[index], bars.close[index], bars.volume[index])
+            complete = bars.timestamps[index] < complete_before
+
+            if not valid_bar(*bar):
+                value = None
+            elif complete and not pending:
+                value = calculator.update(*bar)
+            else:
+                value = calculator.peek(*bar)
+
+            if complete and not pending:
+                state.timestamps.append(bars.timestamps[index])
+                state.values.append(value)
+                self.bars_processed += 1
+            else:
+                pending.append(value)
+
+        return list(reversed(state.values + pending))
+
+    def stats(self) -> dict:
+        """
+        Obtiene los contadores del motor.
+        :return: Diccionario con estados guardados, estados creados y velas procesadas.
+        """
+        return {
+            "states": len(self._states),
+            "max_states": self.max_states,
+            "states_created": self.states_created,
+            "bars_processed": self.bars_processed,
+        }
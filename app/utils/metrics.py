@@ -0,0 +1,156 @@
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# Límites de los buckets de latencia (segundos) y de tamaño (bytes)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Desglose de tiempos por etapa de la solicitud actual (solo si se pidió perfilado)
+current_profile: ContextVar[Optional[dict]] = ContextVar("current_profile", default=None)
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    """Contador monotónico con etiquetas."""
+
+    def __init__(self, name: str, description: str, labels: tuple = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        for label_values, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+class Histogram:
+    """Histograma acumulativo con buckets fijos y etiquetas."""
+
+    def __init__(self, name: str, description: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        series = self._values.get(label_values)
+        if series is None:
+            # Conteo por bucket (el último es +Inf), suma y cantidad
+            series = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, label_values, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, label_values)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, label_values)} {count}")
+        return lines
+
+# Métricas de la aplicación
+STAGE_DURATION = Histogram("quantamu_stage_duration_seconds", "Duración de cada etapa del flujo de datos de mercado.", ("stage",))
+HTTP_REQUEST_DURATION = Histogram("quantamu_http_request_duration_seconds", "Duración de las solicitudes HTTP atendidas.", ("path", "status"))
+UPSTREAM_RESPONSES = Counter("quantamu_upstream_responses_total", "Respuestas recibidas de los proveedores por código.", ("host", "status"))
+UPSTREAM_PAYLOAD_BYTES = Histogram("quantamu_upstream_payload_bytes", "Tamaño de las respuestas de los proveedores.", ("host",), SIZE_BUCKETS)
+LIMITER_WAIT = Histogram("quantamu_limiter_wait_seconds", "Tiempo de espera en el limitador antes de consultar al proveedor.", ("host",))
+PREFETCH_REFRESHES = Counter("quantamu_prefetch_refreshes_total", "Actualizaciones de la precarga por temporalidad y resultado.", ("timeframe", "outcome"))
+
+REGISTRY = (STAGE_DURATION, HTTP_REQUEST_DURATION, UPSTREAM_RESPONSES, UPSTREAM_PAYLOAD_BYTES, LIMITER_WAIT, PREFETCH_REFRESHES)
+
+def record_stage(name: str, duration: float) -> None:
+    """
+    Registra la duración de una etapa en el histograma y en el perfil de la solicitud, si existe.
+    """
+    STAGE_DURATION.observe(duration, name)
+
+    profile = current_profile.get()
+    if profile is not None:
+        total, count = profile.get(name, (0.0, 0))
+        profile[name] = (total + duration, count + 1)
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Mide la duración de una etapa del flujo de datos de mercado.
+    :param name: Nombre de la etapa (ej. 'upstream_request', 'transform_yahoo_data').
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+def timed(name: str):
+    """
+    Decorador que mide la duración de una función (síncrona o asíncrona) como etapa.
+    :param name: Nombre de la etapa.
+    """
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+def server_timing(profile: dict) -> str:
+    """
+    Formatea un perfil como encabezado Server-Timing (duraciones en milisegundos).
+    Las etapas concurrentes se suman, por lo que el total puede superar la duración de la solicitud.
+    """
+    return ", ".join(
+        f'{name};dur={total * 1000:.3f};desc="n={count}"'
+        for name, (total, count) in sorted(profile.items(), key=lambda item: -item[1][0])
+    )
+
+def gauge_lines(name: str, description: str, label: str, values: dict[str, float]) -> list[str]:
+    """
+    Formatea valores instantáneos (ej. estado de cachés y limitadores) como gauges de Prometheus.
+    :param values: Valor por etiqueta.
+    """
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} gauge"]
+    for label_value, value in values.items():
+        lines.append(f'{name}{{{label}="{label_value}"}} {value}')
+    return lines
+
+def render_metrics(gauges: list[list[str]] = ()) -> str:
+    """
+    Genera todas las métricas en formato de texto de Prometheus.
+    :param gauges: Líneas adicionales generadas con gauge_lines.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for gauge in gauges:
+        lines.extend(gauge)
+    return "\n".join(lines) + "\n"
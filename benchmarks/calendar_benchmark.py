@@ -0,0 +1,73 @@
+"""
+Microbenchmark del calendario bursátil: compara las funciones anteriores (lista
+de feriados en texto y recorridos día por día) con TradingCalendar.
+
+Uso: python -m benchmarks.calendar_benchmark
+"""
+import timeit
+from datetime import date, timedelta
+from app.services.trading_calendar import trading_calendar
+
+# Implementación anterior, copiada como referencia
+LEGACY_US_HOLIDAYS = [
+    "2024-01-01", "2024-01-15", "2024-02-19", "2024-03-29", "2024-05-27",
+    "2024-06-19", "2024-07-04", "2024-09-02", "2024-11-28", "2024-12-25",
+    "2025-01-01", "2025-01-20", "2025-02-17", "2025-04-18", "2025-05-26",
+    "2025-06-19", "2025-07-04", "2025-09-01", "2025-11-27", "2025-12-25",
+    "2026-01-01", "2026-01-19", "2026-02-16", "2026-04-03", "2026-05-25",
+    "2026-06-19", "2026-07-03", "2026-09-07", "2026-11-26", "2026-12-25"
+]
+
+def legacy_is_business_day(day: date) -> bool:
+    return day.weekday() < 5 and day.strftime("%Y-%m-%d") not in LEGACY_US_HOLIDAYS
+
+def legacy_business_days_back(day: date, n: int) -> date:
+    business_days = 0
+    while business_days < n:
+        day -= timedelta(days=1)
+        if legacy_is_business_day(day):
+            business_days += 1
+    return day
+
+def legacy_first_business_day_of_month(day: date) -> date:
+    first_day = day.replace(day=1)
+    while not legacy_is_business_day(first_day):
+        first_day += timedelta(days=1)
+    return first_day
+
+def legacy_business_days_between(start: date, end: date) -> int:
+    count = 0
+    while start < end:
+        count += legacy_is_business_day(start)
+        start += timedelta(days=1)
+    return count
+
+def run(number: int = 2000) -> dict:
+    """
+    Ejecuta las comparaciones y devuelve el tiempo promedio por llamada en microsegundos.
+    """
+    day = date(2026, 9, 17)
+    start = date(2025, 1, 1)
+
+    # Construir el índice antes de medir
+    trading_calendar.is_business_day(day)
+
+    cases = {
+        "is_business_day": (lambda: legacy_is_business_day(day), lambda: trading_calendar.is_business_day(day)),
+        "business_days_back(11)": (lambda: legacy_business_days_back(day, 11), lambda: trading_calendar.business_days_back(day, 11)),
+        "first_business_day_of_month": (lambda: legacy_first_business_day_of_month(day), lambda: trading_calendar.first_business_day_of_month(day)),
+        "business_days_between(1y)": (lambda: legacy_business_days_between(start, day), lambda: trading_calendar.business_days_between(start, day)),
+    }
+
+    results = {}
+    for name, (legacy, current) in cases.items():
+        results[name] = {
+            "legacy_us": timeit.timeit(legacy, number=number) / number * 1e6,
+            "calendar_us": timeit.timeit(current, number=number) / number * 1e6,
+        }
+    return results
+
+if __name__ == "__main__":
+    for name, timings in run().items():
+        speedup = timings["legacy_us"] / timings["calendar_us"]
+        print(f"{name:32} legacy {timings['legacy_us']:9.2f} us   calendar {timings['calendar_us']:7.2f} us   x{speedup:,.0f}")
@@ -0,0 +1,153 @@
+"""
+Servidor local que imita Yahoo Finance (chart) para los benchmarks.
+Se configura con variables de entorno:
+
+    FAKE_BARS           Número máximo de velas por respuesta (default 250)
+    FAKE_LATENCY_MS     Latencia base por solicitud en milisegundos (default 50)
+    FAKE_JITTER_MS      Variación aleatoria de la latencia (default 20)
+    FAKE_ERROR_RATE     Fracción de respuestas 500 (default 0)
+    FAKE_THROTTLE_RATE  Fracción de respuestas 429 con Retry-After (default 0)
+
+Uso: uvicorn benchmarks.fake_yahoo:app --port 8900
+"""
+import asyncio
+import os
+import random
+from bisect import bisect_left
+from collections import Counter
+from functools import lru_cache
+from datetime import date, datetime, time, timedelta, timezone
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+BARS = int(os.getenv("FAKE_BARS", "250"))
+LATENCY_MS = float(os.getenv("FAKE_LATENCY_MS", "50"))
+JITTER_MS = float(os.getenv("FAKE_JITTER_MS", "20"))
+ERROR_RATE = float(os.getenv("FAKE_ERROR_RATE", "0"))
+THROTTLE_RATE = float(os.getenv("FAKE_THROTTLE_RATE", "0"))
+
+app = FastAPI()
+calls = Counter()
+
+@lru_cache(maxsize=4096)
+def full_series(symbol: str) -> tuple[list[int], list[tuple]]:
+    """
+    Genera velas diarias deterministas (por símbolo) en días de semana desde 2000 hasta hoy.
+    :return: Tuple con la lista de timestamps y la lista de velas.
+    """
+    rnd = random.Random(symbol)
+    price = rnd.uniform(20, 500)
+    bars = []
+    day = date(2000, 1, 3)
+    end = date.today()
+
+    while day <= end:
+        if day.weekday() < 5:
+            change = rnd.gauss(0, 0.015)
+            open_price = price
+            close_price = price * (1 + change)
+            high = max(open_price, close_price) * (1 + abs(rnd.gauss(0, 0.005)))
+            low = min(open_price, close_price) * (1 - abs(rnd.gauss(0, 0.005)))
+            volume = int(rnd.lognormvariate(15, 0.4))
+            price = close_price
+            timestamp = int(datetime.combine(day, time(13, 30), timezone.utc).timestamp())
+            bars.append((timestamp, open_price, high, low, close_price, volume))
+        day += timedelta(days=1)
+
+    return [bar[0] for bar in bars], bars
+
+def daily_series(symbol: str, start: date, end: date) -> list[tuple]:
+    """
+    Obtiene las velas diarias de un símbolo entre dos fechas (inclusive).
+    """
+    timestamps, bars = full_series(symbol)
+    first = bisect_left(timestamps, int(datetime.combine(start, time(), timezone.utc).timestamp()))
+    last = bisect_left(timestamps, int(datetime.combine(end + timedelta(days=1), time(), timezone.utc).timestamp()))
+    return bars[first:last]
+
+def aggregate(bars: list[tuple], interval: str) -> list[tuple]:
+    """
+    Agrupa velas diarias en semanas (lunes) o meses (día 1), como Yahoo Finance.
+    """
+    result = []
+    for timestamp, open_price, high, low, close_price, volume in bars:
+        day = datetime.fromtimestamp(timestamp, timezone.utc).date()
+        start = day - timedelta(days=day.weekday()) if interval == "1wk" else day.replace(day=1)
+        period = int(datetime.combine(start, time(4, 0), timezone.utc).timestamp())
+
+        if result and result[-1][0] == period:
+            previous = result[-1]
+            result[-1] = (period, previous[1], max(previous[2], high), min(previous[3], low), close_price, previous[5] + volume)
+        else:
+            result.append((period, open_price, high, low, close_price, volume))
+
+    return result
+
+def chart_response(symbol: str, interval: str, period1: int, period2: int) -> dict:
+    """
+    Construye una respuesta con la forma de 'chart.result' de Yahoo Finance.
+    """
+    end = datetime.fromtimestamp(period2, timezone.utc).date()
+    start = datetime.fromtimestamp(period1, timezone.utc).date()
+    if interval == "1wk":
+        start -= timedelta(days=start.weekday())
+    elif interval == "1mo":
+        start = start.replace(day=1)
+
+    bars = daily_series(symbol, start, end)
+    if interval != "1d":
+        bars = aggregate(bars, interval)
+    bars = bars[-BARS:]
+
+    timestamps, opens, highs, lows, closes, volumes = (list(column) for column in zip(*bars)) if bars else ([],) * 6
+    result = {
+        "meta": {
+            "currency": "USD",
+            "symbol": symbol.upper(),
+            "exchangeName": "NMS",
+            "instrumentType": "EQUITY",
+            "regularMarketPrice": closes[-1] if closes else None,
+            "dataGranularity": interval,
+            "range": "",
+        },
+        "indicators": {
+            "quote": [{"open": opens, "high": highs, "low": lows, "close": closes, "volume": volumes}],
+            "adjclose": [{"adjclose": closes}],
+        },
+    }
+    if timestamps:
+        result["timestamp"] = timestamps
+
+    return {"chart": {"result": [result], "error": None}}
+
+async def simulate_upstream(kind: str):
+    """
+    Aplica la latencia configurada y decide si la respuesta será un error o un 429.
+    :return: Respuesta de error o None si la solicitud debe responderse normalmente.
+    """
+    calls[kind] += 1
+    await asyncio.sleep(max(0.0, LATENCY_MS + random.uniform(-JITTER_MS, JITTER_MS)) / 1000)
+
+    roll = random.random()
+    if roll < THROTTLE_RATE:
+        calls["throttled"] += 1
+        return JSONResponse({"error": "Too Many Requests"}, status_code=429, headers={"Retry-After": "1"})
+    if roll < THROTTLE_RATE + ERROR_RATE:
+        calls["errors"] += 1
+        return JSONResponse({"error": "Internal Server Error"}, status_code=500)
+    return None
+
+@app.get("/v8/finance/chart/{symbol}")
+async def chart(
+    symbol: str,
+    interval: str = Query("1d"),
+    period1: int = Query(...),
+    period2: int = Query(...),
+):
+    error = await simulate_upstream("chart")
+    return error or chart_response(symbol, interval, period1, period2)
+
+@app.get("/_stats")
+async def stats():
+    """Contadores de solicitudes recibidas por tipo."""
+    return dict(calls)
@@ -0,0 +1,200 @@
+"""
+Verificación y microbenchmark del motor de indicadores técnicos.
+
+Compara IndicatorEngine con una implementación de referencia que recalcula
+cada valor desde el inicio de la serie: con la serie completa, agregando
+velas de una en una y con una vela en curso que cambia entre consultas.
+Después mide el cálculo completo contra la actualización al agregar una vela.
+
+Uso: python -m benchmarks.indicator_benchmark
+"""
+import os
+import sys
+import timeit
+from datetime import date, datetime, timezone
+from benchmarks.fake_yahoo import daily_series
+
+# La configuración exige este valor aunque el benchmark no lo usa
+os.environ.setdefault("MARKET_DATA_API_URL", "http://127.0.0.1:8900/v8/finance/chart")
+
+from app.services.transformers import Bars
+from app.utils.indicators import IndicatorEngine, parse_indicators, valid_bar
+
+SPECS = parse_indicators("sma:20,ema:12,rsi:14,atr:14,vwap,sma:1,ema:1,rsi:2,atr:1")
+
+# Diferencia relativa máxima aceptada (solo redondeo de punto flotante)
+TOLERANCE = 1e-9
+
+def reference_value(name: str, period: int, bars: list[tuple]) -> float:
+    """
+    Calcula el valor del indicador en la última vela recorriendo toda la historia.
+    :param bars: Velas (high, low, close, volume) válidas, de la más antigua a la más reciente.
+    :return: Valor del indicador o None si no hay suficiente historia.
+    """
+    closes = [bar[2] for bar in bars]
+
+    if name == "sma":
+        return sum(closes[-period:]) / period if len(closes) >= period else None
+
+    if name == "ema":
+        if len(closes) < period:
+            return None
+        value = sum(closes[:period]) / period
+        for close in closes[period:]:
+            value = value + 2 / (period + 1) * (close - value)
+        return value
+
+    if name == "rsi":
+        changes = [current - previous for previous, current in zip(closes, closes[1:])]
+        if len(changes) < period:
+            return None
+        gain = sum(max(change, 0.0) for change in changes[:period]) / period
+        loss = sum(max(-change, 0.0) for change in changes[:period]) / period
+        for change in changes[period:]:
+            gain = (gain * (period - 1) + max(change, 0.0)) / period
+            loss = (loss * (period - 1) + max(-change, 0.0)) / period
+        return 100.0 if loss == 0 else 100 - 100 / (1 + gain / loss)
+
+    if name == "atr":
+        ranges = [
+            high - low if index == 0 else max(high - low, abs(high - bars[index - 1][2]), abs(low - bars[index - 1][2]))
+            for index, (high, low, _, _) in enumerate(bars)
+        ]
+        if len(ranges) < period:
+            return None
+        value = sum(ranges[:period]) / period
+        for true_range in ranges[period:]:
+            value = (value * (period - 1) + true_range) / period
+        return value
+
+    volume = sum(bar[3] for bar in bars)
+    return sum((high + low + close) / 3 * volume for high, low, close, volume in bars) / volume if volume > 0 else None
+
+def reference_series(name: str, period: int, bars: Bars) -> list:
+    """
+    Recalcula el indicador para cada vela de la serie desde su inicio.
+    :return: Valores alineados con las velas (de la más reciente a la más antigua).
+    """
+    history, values = [], []
+    for index in range(len(bars) - 1, -1, -1):
+        bar = (bars.high[index], bars.low[index], bars.close[index], bars.volume[index])
+        if not valid_bar(*bar):
+            values.append(None)
+            continue
+        history.append(bar)
+        values.append(reference_value(name, period, history))
+    return values[::-1]
+
+def make_bars(count: int, symbol: str = "BENCH") -> Bars:
+    """
+    Construye una serie diaria (de la más reciente a la más antigua) con algunas velas nulas.
+    """
+    series = daily_series(symbol, date(2000, 1, 3), datetime.now(timezone.utc).date())[-count:]
+    timestamps, opens, highs, lows, closes, volumes = (list(column) for column in zip(*series))
+
+    # Velas sin datos, como las que a veces devuelve Yahoo Finance
+    for index in range(37, count, 97):
+        closes[index] = None
+
+    columns = [column[::-1] for column in (timestamps, opens, highs, lows, closes, volumes)]
+    return Bars(columns[0], [str(timestamp) for timestamp in columns[0]], *columns[1:])
+
+def prefix(bars: Bars, count: int) -> Bars:
+    """
+    Obtiene las primeras 'count' velas de la serie (las más antiguas), como una consulta anterior.
+    """
+    start = len(bars) - count
+    return Bars(*(column[start:] for column in (bars.timestamps, bars.dates, bars.open, bars.high, bars.low, bars.close, bars.volume)))
+
+def max_difference(values: list, expected: list) -> float:
+    """
+    Obtiene la diferencia relativa máxima entre dos series; infinito si difieren en valores nulos o longitud.
+    """
+    if len(values) != len(expected):
+        return float("inf")
+
+    worst = 0.0
+    for value, reference in zip(values, expected):
+        if (value is None) != (reference is None):
+            return float("inf")
+        if value is not None:
+            worst = max(worst, abs(value - reference) / max(abs(reference), 1.0))
+    return worst
+
+def check(count: int = 400, appended: int = 60) -> dict:
+    """
+    Compara el motor con la referencia en tres escenarios.
+    :return: Diferencia relativa máxima por indicador y escenario.
+    """
+    bars = make_bars(count)
+    results = {}
+
+    for spec in SPECS:
+        expected = reference_series(spec.name, spec.period, bars)
+        engine = IndicatorEngine(max_states=16)
+
+        # Serie completa con la última vela en curso
+        full = engine.compute("BENCH", "1d", bars, spec, bars.timestamps[0])
+
+        # Velas agregadas de una en una sobre el estado ya guardado
+        engine = IndicatorEngine(max_states=16)
+        append = 0.0
+        for size in range(count - appended, count + 1):
+            series = prefix(bars, size)
+            values = engine.compute("BENCH", "1d", series, spec, series.timestamps[0] + 1)
+            append = max(append, max_difference(values, expected[count - size:]))
+
+        # Vela en curso que cambia entre consultas sin alterar el estado
+        engine = IndicatorEngine(max_states=16)
+        engine.compute("BENCH", "1d", bars, spec, bars.timestamps[0])
+        moved = prefix(bars, count)
+        moved.close = [moved.close[0] * 1.05] + moved.close[1:]
+        moved.high = [max(moved.high[0], moved.close[0])] + moved.high[1:]
+        changed = max_difference(engine.compute("BENCH", "1d", moved, spec, bars.timestamps[0]), reference_series(spec.name, spec.period, moved))
+        unchanged = max_difference(engine.compute("BENCH", "1d", bars, spec, bars.timestamps[0]), expected)
+
+        results[spec.label] = {
+            "full": max_difference(full, expected),
+            "append": append,
+            "in_progress": max(changed, unchanged),
+        }
+
+    return results
+
+def run(count: int = 1250, number: int = 200) -> dict:
+    """
+    Mide el cálculo completo de cada indicador y la actualización al agregar una vela.
+    :return: Tiempo promedio por llamada en microsegundos.
+    """
+    bars = make_bars(count + 1)
+    previous = prefix(bars, count)
+    results = {}
+
+    for spec in parse_indicators("sma:20,ema:12,rsi:14,atr:14,vwap"):
+        def full():
+            IndicatorEngine().compute("BENCH", "1d", bars, spec, bars.timestamps[0] + 1)
+
+        def append():
+            engine = IndicatorEngine()
+            engine.compute("BENCH", "1d", previous, spec, bars.timestamps[0] + 1)
+            started = timeit.default_timer()
+            engine.compute("BENCH", "1d", bars, spec, bars.timestamps[0] + 1)
+            return timeit.default_timer() - started
+
+        results[spec.label] = {
+            "full_us": timeit.timeit(full, number=number) / number * 1e6,
+            "append_us": sum(append() for _ in range(number)) / number * 1e6,
+        }
+    return results
+
+if __name__ == "__main__":
+    failures = 0
+    for label, differences in check().items():
+        worst = max(differences.values())
+        failures += worst > TOLERANCE
+        print(f"{label:8} full {differences['full']:.1e}   append {differences['append']:.1e}   in_progress {differences['in_progress']:.1e}   {'ok' if worst <= TOLERANCE else 'FALLA'}")
+
+    for label, timings in run().items():
+        print(f"{label:8} full {timings['full_us']:9.1f} us   append {timings['append_us']:7.1f} us")
+
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,143 @@
+"""
+Microbenchmarks de las etapas de CPU del flujo de datos de mercado.
+
+Uso: python -m benchmarks.micro_benchmarks
+"""
+import json
+import os
+import time
+import timeit
+from datetime import datetime, timezone
+from benchmarks.fake_yahoo import aggregate, daily_series
+from benchmarks import calendar_benchmark, indicator_benchmark
+
+# La configuración exige este valor aunque los microbenchmarks no lo usan
+os.environ.setdefault("MARKET_DATA_API_URL", "http://127.0.0.1:8900/v8/finance/chart")
+
+def yahoo_payload(bars: int, interval: str = "1d", symbol: str = "BENCH") -> dict:
+    """
+    Construye una respuesta cruda de Yahoo Finance con el número de velas indicado.
+    """
+    end = datetime.now(timezone.utc).date()
+    series = daily_series(symbol, datetime(2000, 1, 3).date(), end)
+    if interval != "1d":
+        series = aggregate(series, interval)
+    series = series[-bars:]
+
+    timestamps, opens, highs, lows, closes, volumes = (list(column) for column in zip(*series))
+    return {
+        "chart": {
+            "result": [{
+                "meta": {"symbol": symbol},
+                "timestamp": timestamps,
+                "indicators": {"quote": [{"open": opens, "high": highs, "low": lows, "close": closes, "volume": volumes}]},
+            }]
+        }
+    }
+
+def measure(function, number: int) -> dict:
+    """
+    Mide el tiempo promedio por llamada.
+    :return: Diccionario con el promedio y el mejor de cinco repeticiones en microsegundos.
+    """
+    timings = timeit.repeat(function, number=number, repeat=5)
+    return {
+        "mean_us": round(sum(timings) / len(timings) / number * 1e6, 3),
+        "best_us": round(min(timings) / number * 1e6, 3),
+        "calls": number,
+    }
+
+def bulk_response(symbols: int) -> dict:
+    """
+    Construye una respuesta de /api/market/bulk (filas por temporalidad) para la cantidad de símbolos indicada.
+    """
+    from app.services.transformers import transform_yahoo_data
+    from app.utils.responses import success_response
+
+    results = []
+    for index in range(symbols):
+        # Series distintas por símbolo para que la compresión no se vea favorecida por datos repetidos
+        symbol = f"S{index:03d}"
+        results.append({
+            "symbol": symbol,
+            "temporalities": {
+                name: transform_yahoo_data(yahoo_payload(bars, interval, symbol), interval)["data"]["bulk"]
+                for name, interval, bars in (("day", "1d", 11), ("week", "1wk", 5), ("month", "1mo", 5))
+            },
+        })
+    return success_response({"results": results}, "Market data retrieved for multiple symbols")
+
+def serialization_benchmarks() -> dict:
+    """
+    Compara el camino genérico de FastAPI (jsonable_encoder + json) con dumps y mide
+    los bytes enviados con y sin compresión para respuestas de /api/market/bulk.
+    """
+    from fastapi.encoders import jsonable_encoder
+    from app.utils.encoding import compress, dumps, supported_encodings
+
+    results = {}
+    for symbols in (10, 100):
+        content = bulk_response(symbols)
+        number = max(5, 2000 // symbols)
+        body = dumps(content)
+
+        results[f"serialize.jsonable_encoder+json[bulk,{symbols}]"] = measure(
+            lambda: json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8"),
+            number,
+        )
+        results[f"serialize.dumps[bulk,{symbols}]"] = {**measure(lambda: dumps(content), number), "bytes": len(body)}
+
+        for encoding in supported_encodings():
+            compressed = compress(body, encoding)
+            results[f"compress.{encoding}[bulk,{symbols}]"] = {
+                **measure(lambda: compress(body, encoding), number),
+                "bytes": len(compressed),
+                "saved_pct": round(100 * (1 - len(compressed) / len(body)), 1),
+            }
+
+    return results
+
+def run() -> dict:
+    """
+    Ejecuta todos los microbenchmarks.
+    :return: Resultados por caso.
+    """
+    from app.services.transformers import parse_yahoo_data, transform_yahoo_data
+    from app.utils.analyzers import determine_unusual_volume
+    from app.services.volume_scanner import VolumeMatrix, scan_volume_matrix
+
+    results = {}
+
+    for bars in (30, 250, 1250, 5000):
+        payload = yahoo_payload(bars)
+        number = max(10, 20000 // bars)
+        results[f"transform_yahoo_data[1d,{bars}]"] = measure(lambda: transform_yahoo_data(payload, "1d"), number)
+        results[f"parse_yahoo_data[1d,{bars}]"] = measure(lambda: parse_yahoo_data(payload, "1d"), number)
+
+    payload = yahoo_payload(260, "1wk")
+    results["transform_yahoo_data[1wk,260]"] = measure(lambda: transform_yahoo_data(payload, "1wk"), 100)
+
+    day_data = {"bulk": transform_yahoo_data(yahoo_payload(11), "1d")["data"]["bulk"]}
+    results["determine_unusual_volume[11]"] = measure(lambda: determine_unusual_volume(day_data), 20000)
+
+    # Escaneo de volumen de un universo del tamaño del S&P 500 con velas ya en memoria
+    matrix = VolumeMatrix(12)
+    for index in range(500):
+        matrix.add(f"S{index:03d}", parse_yahoo_data(yahoo_payload(12), "1d")["data"]["bulk"])
+    results["scan_volume_matrix[500x12]"] = measure(lambda: scan_volume_matrix(matrix, 10, 2.0, 2.0), 20)
+
+    results.update(serialization_benchmarks())
+
+    for name, timings in calendar_benchmark.run().items():
+        results[f"calendar.{name}"] = {"legacy_us": round(timings["legacy_us"], 3), "mean_us": round(timings["calendar_us"], 3)}
+
+    for label, timings in indicator_benchmark.run(number=50).items():
+        results[f"indicators.{label}[1250]"] = {"full_us": round(timings["full_us"], 3), "mean_us": round(timings["append_us"], 3)}
+
+    return results
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    for name, result in run().items():
+        print(f"{name:45} {result['mean_us']:12.3f} us")
+    print(f"total {time.perf_counter() - started:.1f} s")
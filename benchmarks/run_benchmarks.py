@@ -0,0 +1,255 @@
+"""
+Benchmark de carga y latencia del flujo de datos de mercado.
+
+Levanta el servidor local que imita Yahoo Finance (benchmarks/fake_yahoo.py) y
+la aplicación apuntando a él mediante MARKET_DATA_API_URL.
+Luego recorre /api/market, /api/market/bulk y /api/market/custom con cantidades
+crecientes de símbolos y de concurrencia. Reporta latencias p50/p95/p99,
+throughput, bytes recibidos por respuesta, solicitudes al proveedor y RSS
+máximo de la aplicación. También ejecuta los microbenchmarks y guarda todo en
+JSON para comparar corridas. El arranque en frío se mide con
+benchmarks/startup_benchmark.py, que además falla si se excede su presupuesto.
+
+Uso:
+    python -m benchmarks.run_benchmarks [--symbols 1,10,50] [--concurrency 1,8,32]
+        [--requests 40] [--latency-ms 50] [--bars 250] [--error-rate 0]
+        [--throttle-rate 0] [--no-cache] [--accept-encoding identity]
+        [--output benchmarks/results]
+        [--baseline benchmarks/results/anterior.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+def free_port() -> int:
+    """Obtiene un puerto TCP libre en localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(app: str, port: int, env: dict) -> subprocess.Popen:
+    """
+    Inicia un servidor uvicorn en un subproceso y espera a que responda.
+    """
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env={**os.environ, **env},
+    )
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs", timeout=1)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.1)
+
+    process.kill()
+    raise RuntimeError(f"El servidor {app} no respondió en el puerto {port}")
+
+def peak_rss_mb(pid: int) -> dict:
+    """
+    Lee el RSS actual y máximo de un proceso (Linux, /proc).
+    """
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return {"rss_mb": None, "peak_rss_mb": None}
+
+    values = {}
+    for line in status.splitlines():
+        key, _, value = line.partition(":")
+        if key in ("VmRSS", "VmHWM"):
+            values[key] = round(int(value.split()[0]) / 1024, 1)
+
+    return {"rss_mb": values.get("VmRSS"), "peak_rss_mb": values.get("VmHWM")}
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Percentil por rango más cercano."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def drive(base_url: str, paths: list[str], concurrency: int, accept_encoding: str = None) -> dict:
+    """
+    Ejecuta las solicitudes con la concurrencia indicada.
+    :param accept_encoding: Valor de Accept-Encoding; por defecto el de httpx (gzip, deflate y br si está instalado).
+    :return: Latencias, errores, bytes recibidos (comprimidos) y duración total.
+    """
+    queue = list(reversed(paths))
+    latencies = []
+    errors = 0
+    wire_bytes = 0
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors, wire_bytes
+        while queue:
+            path = queue.pop()
+            started = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - started)
+            wire_bytes += response.num_bytes_downloaded
+            if response.status_code != 200 or not response.json().get("success", True):
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    headers = {"Accept-Encoding": accept_encoding} if accept_encoding else None
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits, headers=headers) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        duration = time.perf_counter() - started
+
+    return {"latencies": latencies, "errors": errors, "duration": duration, "wire_bytes": wire_bytes}
+
+def scenario_paths(endpoint: str, symbols: list[str], requests: int) -> list[str]:
+    """
+    Construye las rutas de un escenario. /api/market rota entre los símbolos;
+    los endpoints multi-símbolo piden la lista completa en cada solicitud.
+    """
+    if endpoint == "/api/market":
+        return [f"/api/market?symbol={symbols[index % len(symbols)]}&timeframe=1d" for index in range(requests)]
+    return [f"{endpoint}?symbols={','.join(symbols)}"] * requests
+
+def run_load(args: argparse.Namespace) -> list[dict]:
+    """
+    Ejecuta los escenarios de carga contra la aplicación y el proveedor simulado.
+    """
+    fake_port, app_port = free_port(), free_port()
+    fake_url = f"http://127.0.0.1:{fake_port}"
+
+    fake_env = {
+        "FAKE_BARS": str(args.bars),
+        "FAKE_LATENCY_MS": str(args.latency_ms),
+        "FAKE_ERROR_RATE": str(args.error_rate),
+        "FAKE_THROTTLE_RATE": str(args.throttle_rate),
+    }
+    app_env = {
+        "MARKET_DATA_API_URL": f"{fake_url}/v8/finance/chart",
+        "BAR_STORE_DIR": tempfile.mkdtemp(prefix="quantamu-bench-"),
+    }
+    if args.no_cache:
+        app_env.update({"CACHE_MAX_ENTRIES": "0", "BAR_STORE_ENABLED": "false"})
+
+    fake = start_server("benchmarks.fake_yahoo:app", fake_port, fake_env)
+    app = start_server("app.main:app", app_port, app_env)
+    results = []
+
+    try:
+        scenario = 0
+        for endpoint in ("/api/market", "/api/market/bulk", "/api/market/custom"):
+            for symbol_count in args.symbols:
+                for concurrency in args.concurrency:
+                    scenario += 1
+                    # Símbolos nuevos por escenario para que todos empiecen sin caché
+                    symbols = [f"B{scenario:03d}S{index:04d}" for index in range(symbol_count)]
+                    upstream_before = httpx.get(f"{fake_url}/_stats").json()
+
+                    outcome = asyncio.run(drive(f"http://127.0.0.1:{app_port}", scenario_paths(endpoint, symbols, args.requests), concurrency, args.accept_encoding))
+
+                    upstream_after = httpx.get(f"{fake_url}/_stats").json()
+                    latencies = outcome["latencies"]
+                    result = {
+                        "endpoint": endpoint,
+                        "symbols": symbol_count,
+                        "concurrency": concurrency,
+                        "requests": len(latencies),
+                        "errors": outcome["errors"],
+                        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+                        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+                        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+                        "throughput_rps": round(len(latencies) / outcome["duration"], 2),
+                        "bytes_per_response": round(outcome["wire_bytes"] / len(latencies)),
+                        "upstream_calls": {
+                            kind: upstream_after.get(kind, 0) - upstream_before.get(kind, 0)
+                            for kind in ("chart", "throttled", "errors")
+                        },
+                        **peak_rss_mb(app.pid),
+                    }
+                    results.append(result)
+                    print(
+                        f"{endpoint:20} symbols={symbol_count:<4} conc={concurrency:<3} "
+                        f"p50={result['p50_ms']:9.1f}ms p95={result['p95_ms']:9.1f}ms p99={result['p99_ms']:9.1f}ms "
+                        f"rps={result['throughput_rps']:8.2f} bytes={result['bytes_per_response']:<8} upstream={result['upstream_calls']['chart']:<5} "
+                        f"peak_rss={result['peak_rss_mb']}MB"
+                    )
+    finally:
+        app.terminate()
+        fake.terminate()
+        app.wait()
+        fake.wait()
+
+    return results
+
+def compare(current: dict, baseline_path: str) -> None:
+    """
+    Imprime la variación de p50/p95 y throughput respecto de una corrida anterior.
+    """
+    baseline = json.loads(Path(baseline_path).read_text())
+    previous = {(row["endpoint"], row["symbols"], row["concurrency"]): row for row in baseline.get("load", [])}
+
+    print(f"\nComparación con {baseline_path}")
+    for row in current["load"]:
+        before = previous.get((row["endpoint"], row["symbols"], row["concurrency"]))
+        if not before:
+            continue
+        print(
+            f"{row['endpoint']:20} symbols={row['symbols']:<4} conc={row['concurrency']:<3} "
+            f"p50 {before['p50_ms']:9.1f} -> {row['p50_ms']:9.1f}ms  "
+            f"p95 {before['p95_ms']:9.1f} -> {row['p95_ms']:9.1f}ms  "
+            f"rps {before['throughput_rps']:8.2f} -> {row['throughput_rps']:8.2f}"
+        )
+
+def parse_args() -> argparse.Namespace:
+    def int_list(value: str) -> list[int]:
+        return [int(item) for item in value.split(",")]
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int_list, default=[1, 10, 50], help="Cantidades de símbolos por escenario")
+    parser.add_argument("--concurrency", type=int_list, default=[1, 8, 32], help="Niveles de concurrencia de clientes")
+    parser.add_argument("--requests", type=int, default=40, help="Solicitudes por escenario")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Latencia simulada del proveedor")
+    parser.add_argument("--bars", type=int, default=250, help="Velas máximas por respuesta del proveedor")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas 500 del proveedor")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fracción de respuestas 429 del proveedor")
+    parser.add_argument("--no-cache", action="store_true", help="Desactiva la caché y el almacén de velas de la aplicación")
+    parser.add_argument("--accept-encoding", help="Accept-Encoding de los clientes (ej. 'identity' para medir sin compresión)")
+    parser.add_argument("--skip-micro", action="store_true", help="No ejecutar los microbenchmarks ni el benchmark de arranque")
+    parser.add_argument("--output", default="benchmarks/results", help="Directorio donde guardar el JSON de resultados")
+    parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+    return parser.parse_args()
+
+def main() -> None:
+    args = parse_args()
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "load": run_load(args),
+    }
+
+    if not args.skip_micro:
+        from benchmarks import micro_benchmarks, startup_benchmark
+        report["micro"] = micro_benchmarks.run()
+        report["startup"] = startup_benchmark.run()
+
+    output = ROOT / args.output
+    output.mkdir(parents=True, exist_ok=True)
+    path = output / f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    path.write_text(json.dumps(report, indent=2))
+    print(f"\nResultados guardados en {path}")
+
+    if args.baseline:
+        compare(report, args.baseline)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark de arranque en frío de la aplicación.
+
+Cada corrida usa un proceso nuevo de Python que importa app.main y atiende
+dos solicitudes ASGI en memoria, sin servidor ni red: /health (no carga los
+servicios) y /openapi.json (registra los routers e importa todos los
+servicios). Se reporta la mediana de:
+
+    import_ms                 Tiempo de importar app.main
+    first_response_ms         Desde el inicio del import hasta la respuesta de /health
+    first_api_response_ms     Desde el inicio del import hasta la respuesta de /openapi.json
+
+También verifica que importar la aplicación no cargue httpx ni los servicios
+y no lea la configuración. Termina con código 1 si algo de esto falla o si se
+excede algún presupuesto, para usarlo como verificación en CI.
+
+Uso:
+    python -m benchmarks.startup_benchmark [--runs 5] [--max-import-ms 1000]
+        [--max-first-response-ms 1200] [--max-first-api-response-ms 2500]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Módulos (y sus submódulos) que no deben cargarse solo por importar la aplicación
+EAGER_MODULES = ("httpx", "app.api.endpoints", "app.services")
+
+CHILD = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+from app.core.config import get_settings
+eager = sorted(name for name in sys.modules if any(name == prefix or name.startswith(prefix + ".") for prefix in {eager!r}))
+settings_resolved = get_settings.cache_info().currsize > 0
+
+async def request(path):
+    messages = []
+    scope = {{"type": "http", "asgi": {{"version": "3.0"}}, "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"", "headers": [],
+             "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80)}}
+
+    async def receive():
+        return {{"type": "http.request", "body": b"", "more_body": False}}
+
+    async def send(message):
+        messages.append(message)
+
+    await app.main.app(scope, receive, send)
+    return messages[0]["status"]
+
+async def main():
+    health = await request("/health")
+    first_response = time.perf_counter()
+    openapi = await request("/openapi.json")
+    first_api_response = time.perf_counter()
+    return health, openapi, first_response, first_api_response
+
+health, openapi, first_response, first_api_response = asyncio.run(main())
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "first_response_ms": (first_response - started) * 1000,
+    "first_api_response_ms": (first_api_response - started) * 1000,
+    "statuses": [health, openapi],
+    "eager_modules": eager,
+    "settings_resolved_at_import": settings_resolved,
+}}))
+"""
+
+def measure_once() -> dict:
+    """
+    Ejecuta una corrida en un proceso nuevo.
+    :return: Tiempos y verificaciones de la corrida.
+    """
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    env.setdefault("MARKET_DATA_API_URL", "http://127.0.0.1:8900/v8/finance/chart")
+
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(eager=EAGER_MODULES)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def run(runs: int = 5) -> dict:
+    """
+    Ejecuta varias corridas y resume las medianas.
+    :return: Medianas en milisegundos y resultado de las verificaciones.
+    """
+    samples = [measure_once() for _ in range(runs)]
+
+    return {
+        **{
+            key: round(statistics.median(sample[key] for sample in samples), 1)
+            for key in ("import_ms", "first_response_ms", "first_api_response_ms")
+        },
+        "runs": runs,
+        "statuses_ok": all(sample["statuses"] == [200, 200] for sample in samples),
+        "eager_modules": sorted({name for sample in samples for name in sample["eager_modules"]}),
+        "settings_resolved_at_import": any(sample["settings_resolved_at_import"] for sample in samples),
+    }
+
+def check(result: dict, budgets: dict) -> list[str]:
+    """
+    Compara el resultado con los presupuestos.
+    :return: Lista de incumplimientos (vacía si todo está dentro del presupuesto).
+    """
+    failures = [
+        f"{key} = {result[key]} ms > {budget} ms"
+        for key, budget in budgets.items()
+        if result[key] > budget
+    ]
+    if not result["statuses_ok"]:
+        failures.append("/health o /openapi.json no respondió 200")
+    if result["eager_modules"]:
+        failures.append(f"importar app.main cargó {', '.join(result['eager_modules'])}")
+    if result["settings_resolved_at_import"]:
+        failures.append("importar app.main leyó la configuración")
+    return failures
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Procesos nuevos a medir")
+    parser.add_argument("--max-import-ms", type=float, default=1000, help="Presupuesto de import_ms")
+    parser.add_argument("--max-first-response-ms", type=float, default=1200, help="Presupuesto de first_response_ms")
+    parser.add_argument("--max-first-api-response-ms", type=float, default=2500, help="Presupuesto de first_api_response_ms")
+    args = parser.parse_args()
+
+    result = run(args.runs)
+    print(json.dumps(result, indent=2))
+
+    failures = check(result, {
+        "import_ms": args.max_import_ms,
+        "first_response_ms": args.max_first_response_ms,
+        "first_api_response_ms": args.max_first_api_response_ms,
+    })
+    for failure in failures:
+        print(f"FALLA: {failure}")
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Las pruebas importan el paquete 'app' desde la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# La configuración exige este valor aunque las pruebas no consultan al proveedor
+os.environ.setdefault("MARKET_DATA_API_URL", "http://127.0.0.1:9/v8/finance/chart")
@@ -0,0 +1,53 @@
+"""
+Graba respuestas reales de Yahoo Finance (chart v8) para las pruebas de remuestreo.
+
+Descarga '1d', '1wk' y '1mo' de cada símbolo para el mismo rango histórico
+(completo, sin periodos en curso) y las guarda en tests/fixtures/yahoo como
+<SÍMBOLO>_<granularidad>.json, con los mismos parámetros que usa el servicio.
+Mientras no haya grabaciones, el modo 'resample' queda desactivado
+(RESAMPLE_MODE_ENABLED).
+
+Uso: python tests/fixtures/record_yahoo.py [SÍMBOLO ...]
+"""
+import json
+import os
+import sys
+from datetime import datetime, timezone
+import httpx
+
+URL = "https://query1.finance.yahoo.com/v8/finance/chart"
+SYMBOLS = ["AAPL", "MSFT", "SPY"]
+
+# Rango fijo que empieza en domingo 1 de enero: la primera semana y el primer mes quedan completos
+PERIOD1 = int(datetime(2023, 1, 1, tzinfo=timezone.utc).timestamp())
+PERIOD2 = int(datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp())
+
+DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "yahoo")
+
+def record(client: httpx.Client, symbol: str, timeframe: str) -> str:
+    """
+    Descarga y guarda una respuesta.
+    :return: Ruta del archivo guardado.
+    """
+    response = client.get(f"{URL}/{symbol}", params={
+        "events": "capitalGain|div|split",
+        "formatted": "true",
+        "includeAdjustedClose": "true",
+        "interval": timeframe,
+        "period1": PERIOD1,
+        "period2": PERIOD2,
+        "region": "US",
+    })
+    response.raise_for_status()
+
+    path = os.path.join(DIRECTORY, f"{symbol}_{timeframe}.json")
+    with open(path, "w") as file:
+        json.dump(response.json(), file)
+    return path
+
+if __name__ == "__main__":
+    os.makedirs(DIRECTORY, exist_ok=True)
+    with httpx.Client(timeout=30) as client:
+        for symbol in sys.argv[1:] or SYMBOLS:
+            for timeframe in ("1d", "1wk", "1mo"):
+                print(record(client, symbol.upper(), timeframe))
@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from app.services import market_data
+from app.services.bar_store import BarStore, chart_payload
+
+def timestamp(day: date, hour: int = 0, minute: int = 0) -> int:
+    return int(datetime(day.year, day.month, day.day, hour, minute, tzinfo=timezone.utc).timestamp())
+
+def daily_bars(period1: int, period2: int) -> list[tuple]:
+    """
+    Velas diarias fijas (días hábiles) con timestamp en [period1, period2).
+    """
+    bars, day = [], date(2024, 1, 1)
+    while day < date(2024, 12, 31):
+        bar_timestamp = timestamp(day, 14, 30)
+        if day.weekday() < 5 and period1 <= bar_timestamp < period2:
+            bars.append((bar_timestamp, 100.0, 101.0, 99.0, 100.5, 1000))
+        day += timedelta(days=1)
+    return bars
+
+def test_concurrent_appends_do_not_duplicate_bars(monkeypatch, tmp_path):
+    store = BarStore(str(tmp_path))
+    monkeypatch.setattr(market_data, "bar_store", store)
+
+    async def download_chart(symbol, timeframe, period1, period2, client=None):
+        await asyncio.sleep(0.01)
+        return chart_payload(symbol, daily_bars(period1, period2))
+
+    monkeypatch.setattr(market_data, "download_chart", download_chart)
+
+    async def main():
+        start = timestamp(date(2024, 1, 1))
+        await market_data.fetch_with_bar_store("TEST", "1d", start, timestamp(date(2024, 2, 1)))
+
+        # Dos solicitudes que continúan la misma cobertura al mismo tiempo
+        await asyncio.gather(
+            market_data.fetch_with_bar_store("TEST", "1d", start, timestamp(date(2024, 3, 1))),
+            market_data.fetch_with_bar_store("TEST", "1d", start, timestamp(date(2024, 4, 1))),
+        )
+        return start
+
+    start = asyncio.run(main())
+    end = timestamp(date(2024, 4, 1))
+
+    assert store.coverage("TEST", "1d").covered_to == end
+    assert store.read("TEST", "1d", start, end) == daily_bars(start, end)
+
+def test_append_skips_bars_already_covered(tmp_path):
+    store = BarStore(str(tmp_path))
+    start, middle, end = (timestamp(date(2024, month, 1)) for month in (1, 2, 3))
+    store.write("TEST", "1d", "TEST", start, middle, daily_bars(start, middle))
+
+    store.append("TEST", "1d", end, daily_bars(start, end))
+    store.append("TEST", "1d", middle, daily_bars(start, middle))
+
+    assert store.coverage("TEST", "1d").covered_to == end
+    assert store.read("TEST", "1d", start, end) == daily_bars(start, end)
+
+def test_rejects_symbols_outside_allowlist(tmp_path):
+    store = BarStore(str(tmp_path / "store"))
+
+    for symbol in ("../../etc/passwd", "AAPL/../MSFT", "A B", "", "X" * 16):
+        assert not store.accepts(symbol, "1d")
+        with pytest.raises(ValueError):
+            store.coverage(symbol, "1d")
+
+    assert not store.accepts("AAPL", "../1d")
+    assert all(store.accepts(symbol, "1d") for symbol in ("aapl", "BRK.B", "^GSPC", "EURUSD=X", "BTC-USD"))
+    assert not (tmp_path / "store").exists()
+
+def test_split_rewrites_stored_series(monkeypatch, tmp_path):
+    store = BarStore(str(tmp_path))
+    monkeypatch.setattr(market_data, "bar_store", store)
+    split_at = timestamp(date(2024, 2, 15))
+    split = {"splits": {str(split_at): {"date": split_at, "numerator": 2, "denominator": 1, "splitRatio": "2:1"}}}
+
+    async def download_chart(symbol, timeframe, period1, period2, client=None):
+        # Después del split, Yahoo devuelve toda la historia ajustada (precios a la mitad)
+        bars = [(bar[0], *(price / 2 for price in bar[1:5]), bar[5]) for bar in daily_bars(period1, period2)]
+        raw_data = chart_payload(symbol, bars)
+        if period2 > split_at:
+            raw_data["chart"]["result"][0]["events"] = split
+        return raw_data
+
+    async def stored_download(symbol, timeframe, period1, period2, client=None):
+        return chart_payload(symbol, daily_bars(period1, period2))
+
+    start, middle, end = (timestamp(date(2024, month, 1)) for month in (1, 2, 3))
+    monkeypatch.setattr(market_data, "download_chart", stored_download)
+    asyncio.run(market_data.fetch_with_bar_store("TEST", "1d", start, middle))
+    monkeypatch.setattr(market_data, "download_chart", download_chart)
+    asyncio.run(market_data.fetch_with_bar_store("TEST", "1d", start, end))
+
+    stored = store.read("TEST", "1d", start, end)
+    assert store.coverage("TEST", "1d").covered_from == start
+    assert [bar[0] for bar in stored] == [bar[0] for bar in daily_bars(start, end)]
+    assert all(bar[4] == 50.25 for bar in stored)
+
+def test_adjusted_history_without_events_rewrites_stored_series(monkeypatch, tmp_path):
+    store = BarStore(str(tmp_path))
+    monkeypatch.setattr(market_data, "bar_store", store)
+    start, middle, end = (timestamp(date(2024, month, 1)) for month in (1, 2, 3))
+    store.write("TEST", "1d", "TEST", start, middle, daily_bars(start, middle))
+
+    async def download_chart(symbol, timeframe, period1, period2, client=None):
+        # La última vela guardada ya no coincide: el proveedor ajustó la historia
+        return chart_payload(symbol, [(bar[0], *(price / 2 for price in bar[1:5]), bar[5]) for bar in daily_bars(period1, period2)])
+
+    monkeypatch.setattr(market_data, "download_chart", download_chart)
+    asyncio.run(market_data.fetch_with_bar_store("TEST", "1d", start, end))
+
+    assert all(bar[4] == 50.25 for bar in store.read("TEST", "1d", start, end))
@@ -0,0 +1,75 @@
+import asyncio
+import httpx
+import pytest
+from app.api.endpoints import market_data as endpoints
+from app.core.config import settings
+from app.main import app, include_routers
+
+def symbol_result(symbol: str, error: str = None) -> dict:
+    bars = [] if error else [{"date": "2024-06-03", "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 10}]
+    result = {
+        "symbol": symbol,
+        "temporalities": {"day": bars, "week": bars, "month": bars},
+        "status": "upstream_error" if error else "ok",
+        "statuses": dict.fromkeys(("day", "week", "month"), "upstream_error" if error else "ok"),
+    }
+    if error:
+        result["errors"] = dict.fromkeys(("day", "week", "month"), error)
+    return result
+
+@pytest.fixture
+def client(monkeypatch):
+    include_routers()
+
+    async def fetch_multiple_market_data_service(symbols, columnar=False, mode="upstream", indicators=None, deadline=None):
+        return [symbol_result(symbol, "HTTP error" if symbol.startswith("ERR") else None) for symbol in symbols]
+
+    monkeypatch.setattr(endpoints, "fetch_multiple_market_data_service", fetch_multiple_market_data_service)
+
+    def get(params: dict, headers: dict = None) -> httpx.Response:
+        async def request():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+                return await http.get("/api/market/bulk", params=params, headers=headers)
+        return asyncio.run(request())
+
+    return get
+
+def test_failed_symbols_are_not_cacheable(client):
+    response = client({"symbols": "AAPL,ERR1"})
+
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+    assert response.headers["cache-control"] == "no-store"
+    assert response.json()["data"]["summary"]["statuses"]["upstream_error"] == 1
+
+def test_complete_response_is_cacheable(client):
+    response = client({"symbols": "AAPL,MSFT"})
+
+    assert "etag" in response.headers
+    assert response.headers["cache-control"].startswith("public")
+
+def test_deadline_changes_etag_and_is_in_vary(client):
+    plain = client({"symbols": "AAPL"})
+    bounded = client({"symbols": "AAPL"}, headers={"X-Deadline-Ms": "5000"})
+
+    assert plain.headers["etag"] != bounded.headers["etag"]
+    assert "X-Deadline-Ms" in bounded.headers["vary"] and "Accept-Encoding" in bounded.headers["vary"]
+
+    # Un ETag obtenido sin plazo no valida la respuesta con plazo
+    assert client({"symbols": "AAPL"}, headers={"X-Deadline-Ms": "5000", "If-None-Match": plain.headers["etag"]}).status_code == 200
+    assert client({"symbols": "AAPL"}, headers={"If-None-Match": plain.headers["etag"]}).status_code == 304
+
+def test_resample_mode_is_disabled_by_default(client):
+    assert client({"symbols": "AAPL", "mode": "resample"}).status_code == 422
+
+def test_not_modified_keeps_the_encoded_etag(client, monkeypatch):
+    monkeypatch.setattr(settings, "compression_min_size", 0)
+
+    for accept_encoding, suffix in (("gzip", '-gzip"'), ("identity", None)):
+        headers = {"Accept-Encoding": accept_encoding}
+        response = client({"symbols": "AAPL"}, headers=headers)
+        revalidated = client({"symbols": "AAPL"}, headers={**headers, "If-None-Match": response.headers["etag"]})
+
+        assert response.headers["etag"].endswith('-gzip"') == (suffix is not None)
+        assert revalidated.status_code == 304
+        assert revalidated.headers["etag"] == response.headers["etag"]
@@ -0,0 +1,14 @@
+from datetime import datetime, timezone
+from app.utils.http_cache import cache_control
+
+NOW = datetime(2024, 6, 12, 15, 0, tzinfo=timezone.utc)
+PERIOD2 = int(datetime(2024, 3, 1, tzinfo=timezone.utc).timestamp())
+
+def test_historical_daily_range_is_immutable():
+    assert "immutable" in cache_control(("1d",), PERIOD2, NOW)
+
+def test_weekly_and_monthly_ranges_are_never_immutable():
+    # La última vela semanal o mensual se descarta según el día de la consulta
+    for timeframe in ("1wk", "1mo"):
+        assert "immutable" not in cache_control((timeframe,), PERIOD2, NOW)
+    assert "immutable" not in cache_control(("1d", "1wk", "1mo"), PERIOD2, NOW)
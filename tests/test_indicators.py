@@ -0,0 +1,125 @@
+import asyncio
+import math
+from datetime import date, datetime, timedelta, timezone
+import pytest
+from app.services import market_data
+from app.services.transformers import Bars
+from app.utils.indicators import IndicatorEngine, parse_indicators
+
+def make_series(start: date = date(2023, 1, 2), end: date = date(2024, 6, 28)) -> Bars:
+    """
+    Serie diaria fija (días hábiles), de la vela más reciente a la más antigua.
+    """
+    timestamps, closes = [], []
+    day, index = start, 0
+    while day <= end:
+        if day.weekday() < 5:
+            timestamps.append(int(datetime(day.year, day.month, day.day, 14, 30, tzinfo=timezone.utc).timestamp()))
+            closes.append(100 + 10 * math.sin(index / 7) + 0.05 * index + 3 * math.cos(index / 3))
+            index += 1
+        day += timedelta(days=1)
+
+    timestamps, closes = timestamps[::-1], closes[::-1]
+    return Bars(
+        timestamps,
+        [datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d") for timestamp in timestamps],
+        list(closes),
+        [close + 1 for close in closes],
+        [close - 1 for close in closes],
+        closes,
+        [1000.0] * len(closes),
+    )
+
+def reference_sma(closes: list[float], period: int) -> list:
+    return [sum(closes[index + 1 - period:index + 1]) / period if index + 1 >= period else None for index in range(len(closes))]
+
+def reference_ema(closes: list[float], period: int) -> list:
+    values, value = [], None
+    for index, close in enumerate(closes):
+        if index + 1 == period:
+            value = sum(closes[:period]) / period
+        elif value is not None:
+            value += 2 / (period + 1) * (close - value)
+        values.append(value)
+    return values
+
+def reference_rsi(closes: list[float], period: int) -> list:
+    values, gain, loss = [None], 0.0, 0.0
+    for index in range(1, len(closes)):
+        change = closes[index] - closes[index - 1]
+        if index <= period:
+            gain += max(change, 0.0)
+            loss += max(-change, 0.0)
+            if index < period:
+                values.append(None)
+                continue
+            gain, loss = gain / period, loss / period
+        else:
+            gain = (gain * (period - 1) + max(change, 0.0)) / period
+            loss = (loss * (period - 1) + max(-change, 0.0)) / period
+        values.append(100.0 if loss == 0 else 100 - 100 / (1 + gain / loss))
+    return values
+
+REFERENCES = {"sma": reference_sma, "ema": reference_ema, "rsi": reference_rsi}
+
+def assert_close(values: list, expected: list, tolerance: float) -> None:
+    assert len(values) == len(expected)
+    for value, reference in zip(values, expected):
+        assert (value is None) == (reference is None)
+        if value is not None:
+            assert value == pytest.approx(reference, abs=tolerance)
+
+@pytest.mark.parametrize("label", ["sma:20", "ema:12", "rsi:14"])
+def test_engine_matches_reference(label):
+    bars = make_series()
+    spec = parse_indicators(label)[0]
+    expected = REFERENCES[spec.name](bars.close[::-1], spec.period)[::-1]
+
+    values = IndicatorEngine(max_states=4).compute("TEST", "1d", bars, spec, bars.timestamps[0] + 1)
+
+    assert_close(values, expected, 1e-9)
+
+def serve_series(monkeypatch, bars: Bars) -> list:
+    """
+    Reemplaza la consulta de velas por la serie fija y registra los periodos pedidos.
+    """
+    requests = []
+
+    async def fetch_market_bars(symbol, timeframe, period1, period2, client=None, deadline=None):
+        requests.append((timeframe, period1, period2))
+        return {"data": {"bulk": bars.since(period1)}}
+
+    monkeypatch.setattr(market_data, "fetch_market_bars", fetch_market_bars)
+    return requests
+
+def add_indicators(bars: Bars, display: int, specs: list) -> dict:
+    window = {"data": {"bulk": bars.since(bars.timestamps[display - 1])}}
+    result = asyncio.run(market_data.add_indicators("TEST", "1d", window, specs, bars.timestamps[0] + 1))
+    return result["data"]["indicators"]
+
+def test_indicators_use_warmup_history(monkeypatch):
+    bars = make_series()
+    requests = serve_series(monkeypatch, bars)
+    specs = parse_indicators("sma:20,ema:12,rsi:14")
+
+    # Una ventana de 11 velas, como la respuesta por defecto de /api/market/bulk
+    indicators = add_indicators(bars, 11, specs)
+
+    assert requests and requests[0][1] < bars.timestamps[10]
+    for spec in specs:
+        expected = REFERENCES[spec.name](bars.close[::-1], spec.period)[::-1][:11]
+        assert None not in indicators[spec.label]
+        # La historia empieza después que la serie: EMA y RSI difieren solo por el calentamiento
+        assert_close(indicators[spec.label], expected, 1e-6)
+
+def test_indicators_do_not_depend_on_window_start(monkeypatch):
+    bars = make_series()
+    serve_series(monkeypatch, bars)
+    specs = parse_indicators("sma:20,ema:12,rsi:14")
+
+    # Las ventanas del mismo año comparten la historia; con otro año solo cambia el calentamiento
+    short, longer, other_year = (add_indicators(bars, display, specs) for display in (11, 40, 200))
+
+    for spec in specs:
+        assert short[spec.label] == longer[spec.label][:11]
+        assert_close(short[spec.label], other_year[spec.label][:11], 1e-6)
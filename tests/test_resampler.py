@@ -0,0 +1,48 @@
+import glob
+import json
+import os
+import pytest
+from app.services import transformers
+from app.services.resampler import resample_yahoo_data
+from app.services.transformers import parse_yahoo_data, render_bulk, transform_yahoo_data
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "yahoo")
+
+def recorded_symbols() -> list[str]:
+    """
+    Símbolos con las tres granularidades grabadas (ver fixtures/record_yahoo.py).
+    """
+    symbols = {os.path.basename(path).rsplit("_", 1)[0] for path in glob.glob(os.path.join(FIXTURES, "*_1d.json"))}
+    return sorted(
+        symbol for symbol in symbols
+        if all(os.path.exists(os.path.join(FIXTURES, f"{symbol}_{timeframe}.json")) for timeframe in ("1wk", "1mo"))
+    )
+
+def load(symbol: str, timeframe: str) -> dict:
+    with open(os.path.join(FIXTURES, f"{symbol}_{timeframe}.json")) as file:
+        return json.load(file)
+
+@pytest.fixture(autouse=True)
+def keep_latest_bar(monkeypatch):
+    # Las grabaciones son históricas: no se descarta la última vela según la fecha de hoy
+    monkeypatch.setattr(transformers, "is_first_business_day_of_week", lambda: True)
+    monkeypatch.setattr(transformers, "is_first_business_day_of_month", lambda: True)
+
+@pytest.mark.parametrize("timeframe", ["1wk", "1mo"])
+@pytest.mark.parametrize("symbol", recorded_symbols() or [pytest.param(None, marks=pytest.mark.skip(
+    reason="No recorded Yahoo payloads; run python tests/fixtures/record_yahoo.py"
+))])
+def test_resampled_bars_match_native_yahoo_bars(symbol, timeframe):
+    native = transform_yahoo_data(load(symbol, timeframe), timeframe)
+    daily = load(symbol, "1d")
+    period1 = daily["chart"]["result"][0]["timestamp"][0]
+    resampled = render_bulk(resample_yahoo_data(parse_yahoo_data(daily, "1d"), timeframe, period1))
+
+    assert native["error"] is None and resampled["error"] is None
+    native_bars, resampled_bars = native["data"]["bulk"], resampled["data"]["bulk"]
+
+    assert [bar["date"] for bar in resampled_bars] == [bar["date"] for bar in native_bars]
+    for expected, bar in zip(native_bars, resampled_bars):
+        for field in ("open", "high", "low", "close"):
+            assert bar[field] == pytest.approx(expected[field], rel=1e-6), (bar["date"], field)
+        assert bar["volume"] == expected["volume"], bar["date"]
@@ -0,0 +1,18 @@
+from benchmarks import startup_benchmark
+
+def test_import_does_not_load_services_or_settings():
+    sample = startup_benchmark.measure_once()
+
+    assert sample["statuses"] == [200, 200]
+    assert sample["eager_modules"] == []
+    assert not sample["settings_resolved_at_import"]
+
+def test_startup_within_budget():
+    # Presupuestos holgados respecto a los del benchmark para tolerar runners de CI lentos
+    result = startup_benchmark.run(runs=3)
+
+    assert startup_benchmark.check(result, {
+        "import_ms": 2000,
+        "first_response_ms": 2500,
+        "first_api_response_ms": 5000,
+    }) == []